@@ -0,0 +1,201 @@
+import argparse
+import random
+import sys
+
+import task1
+from benchmark_utils import finish_report, new_report, peak_memory, summarize, time_function
+
+
+# Default relative frequency of each operator in random formulas
+DEFAULT_MIX = {'~': 1, '&': 2, '|': 2, '>': 1, '=': 1}
+
+
+def variable_names(num_vars):
+    """Single letters while they last (A-Z), otherwise x0, x1, ..."""
+    if num_vars <= 26:
+        return [chr(ord('A') + i) for i in range(num_vars)]
+    return [f"x{i}" for i in range(num_vars)]
+
+
+def random_formula(num_vars, depth, mix=None, rng=None):
+    """
+    Generate a random well-formed infix formula that uses all `num_vars` variables.
+
+    The formula tree is at most `depth` operators deep and operators are
+    chosen with the relative weights in `mix`. Raises ValueError when no
+    tree of that depth has `num_vars` leaves.
+    """
+    rng = rng or random.Random()
+    mix = mix or DEFAULT_MIX
+    operators = list(mix)
+    weights = [mix[op] for op in operators]
+    binary = [op for op in operators if op != '~']
+    binary_weights = [mix[op] for op in binary]
+    if num_vars > (2 ** depth if binary else 1):
+        raise ValueError(f"A formula of depth {depth} cannot use {num_vars} variables with operators {operators}")
+    leaves = []
+
+    def build(level, need):
+        # `need` is the number of leaves this subtree must have at least
+        # Stop early now and then so the trees are not all full
+        if level == 0 or (need <= 1 and level < depth and rng.random() < 0.2):
+            leaves.append(len(leaves))
+            return "{%d}" % leaves[-1]
+        # One child holds at most 2^(level - 1) leaves; beyond that the node must branch
+        capacity = 2 ** (level - 1)
+        if need > capacity:
+            operator = rng.choices(binary, binary_weights)[0]
+        else:
+            operator = rng.choices(operators, weights)[0]
+        if operator == '~':
+            return f"~{build(level - 1, need)}"
+        left = rng.randint(max(0, need - capacity), min(need, capacity))
+        return f"({build(level - 1, left)}{operator}{build(level - 1, need - left)})"
+
+    template = build(depth, num_vars)
+
+    # First leaves get every variable once (in random order), the rest are random
+    names = variable_names(num_vars)
+    rng.shuffle(names)
+    assigned = names[:len(leaves)] + [rng.choice(names) for _ in range(len(leaves) - len(names))]
+    rng.shuffle(assigned)
+    return template.format(*assigned)
+
+
+def parse_mix(text):
+    """Parse an operator mix such as '&:2,|:2,~:1' into a weight dict."""
+    mix = {}
+    for item in text.split(','):
+        operator, _, weight = item.partition(':')
+        if operator not in task1.PRECEDENCE:
+            raise ValueError(f"Unknown operator in mix: {operator!r}")
+        mix[operator] = float(weight or 1)
+    return mix
+
+
+def result_column(table):
+    """Result column of a list-of-lists truth table."""
+    return [row[-1] for row in table[1:]]
+
+
+# Each engine maps a postfix expression to its result column (bools, bitmask or packed bytes)
+ENGINES = {
+    'row': lambda postfix, workers: result_column(task1.Postfix2Truthtable(postfix)),
+    'compiled': lambda postfix, workers: result_column(task1.Postfix2Truthtable(postfix, mode="compiled")),
+    'bitwise': lambda postfix, workers: result_column(task1.Postfix2Truthtable(postfix, mode="bitwise")),
+    'bitmask': lambda postfix, workers: task1.Postfix2Bitmask(postfix)[1],
+    'parallel': lambda postfix, workers: task1.Postfix2BitmaskParallel(postfix, workers)[1],
+    'compact': lambda postfix, workers: task1.CompactTruthTable.from_postfix(postfix, workers).bits,
+    'stream': lambda postfix, workers: [row[-1] for row in task1.iter_truth_table(postfix)],
+}
+
+
+def as_bits(result, num_rows):
+    """Normalize any engine result (bool list, int bitmask or packed bytes) to an int bitmask."""
+    if isinstance(result, int):
+        return result
+    if isinstance(result, bytes):
+        return int.from_bytes(result, 'little')
+    return sum(1 << i for i, value in enumerate(result) if value)
+
+
+def clear_caches():
+    """Forget parsed and compiled formulas so every run pays the full cost."""
+    task1._parse_tokens.cache_clear()
+    task1._compile_cached.cache_clear()
+
+
+def benchmark_formula(infix, engines, repeat, workers, measure_memory=True):
+    """Time parsing and every engine on one formula and cross-check the results."""
+    postfix = task1.Infix2Postfix(infix)
+    num_vars = len(task1.postfix_variables(postfix))
+    num_rows = 2 ** num_vars
+
+    result = {
+        'formula': infix,
+        'postfix': postfix,
+        'num_vars': num_vars,
+        'num_rows': num_rows,
+        'parse': summarize(time_function(lambda: task1.Infix2Postfix(infix), repeat, clear_caches)),
+        'engines': {},
+    }
+
+    outputs = {}
+    for name in engines:
+        engine = ENGINES[name]
+        output = []
+        durations = time_function(lambda: output.append(engine(postfix, workers)), repeat, clear_caches)
+        outputs[name] = as_bits(output[-1], num_rows)
+        result['engines'][name] = summarize(durations, num_rows)
+        if measure_memory:
+            result['engines'][name]['peak_bytes'] = peak_memory(lambda: engine(postfix, workers), clear_caches)
+
+    # Every engine (and the BDD model count) must agree on the result column
+    reference = next(iter(outputs.values()), None)
+    bdd = task1.BDD(task1.variable_order(postfix))
+    models = bdd.count_models(bdd.build(postfix))
+    result['true_rows'] = models
+    result['consistent'] = (all(bits == reference for bits in outputs.values()) and
+                            (reference is None or bin(reference).count('1') == models))
+    return result
+
+
+def run_benchmarks(var_counts, depth, formulas, repeat, engines, workers=None, mix=None,
+                   seed=0, max_row_vars=16, measure_memory=True):
+    """Benchmark random formulas for every variable count and return a JSON-ready report."""
+    rng = random.Random(seed)
+    report = new_report({
+        'var_counts': var_counts,
+        'depth': depth,
+        'formulas': formulas,
+        'repeat': repeat,
+        'engines': engines,
+        'workers': workers,
+        'mix': mix or DEFAULT_MIX,
+        'seed': seed,
+        'max_row_vars': max_row_vars,
+    })
+
+    for num_vars in var_counts:
+        # Per-row engines are far too slow past a few dozen thousand rows
+        selected = [name for name in engines
+                    if num_vars <= max_row_vars or name not in ('row', 'compiled', 'bitwise', 'stream')]
+        for _ in range(formulas):
+            infix = random_formula(num_vars, depth, mix, rng)
+            result = benchmark_formula(infix, selected, repeat, workers, measure_memory)
+            report['results'].append(result)
+
+            fastest = min(result['engines'].items(), key=lambda item: item[1]['median_s'])
+            print(f"vars={result['num_vars']:3d} rows={result['num_rows']:>10d} "
+                  f"fastest={fastest[0]} ({fastest[1]['median_s']:.6f}s) "
+                  f"consistent={result['consistent']}", file=sys.stderr)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the task1 logic engines on random formulas")
+    parser.add_argument('--vars', type=int, nargs='+', default=[4, 8, 12, 16, 20],
+                        help="variable counts to benchmark")
+    parser.add_argument('--depth', type=int, default=8, help="maximum operator depth of each formula")
+    parser.add_argument('--formulas', type=int, default=3, help="random formulas per variable count")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per measurement")
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--workers', type=int, default=None, help="processes for the parallel engines")
+    parser.add_argument('--mix', type=parse_mix, default=None,
+                        help="operator weights, e.g. '&:2,|:2,~:1,>:1,=:1'")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-row-vars', type=int, default=16,
+                        help="skip per-row engines above this many variables")
+    parser.add_argument('--no-memory', action='store_true', help="skip peak memory measurement")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.vars, args.depth, args.formulas, args.repeat, args.engines,
+                            args.workers, args.mix, args.seed, args.max_row_vars, not args.no_memory)
+
+    finish_report(report, args.output, "Engines disagree on at least one formula!")
+
+
+if __name__ == "__main__":
+    main()
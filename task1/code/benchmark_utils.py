@@ -0,0 +1,79 @@
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+
+# Timing, memory and report helpers shared by the task1 and task2 benchmarks
+
+
+def time_function(function, repeat, setup=None):
+    """
+    Run function `repeat` times and return the list of durations in seconds.
+
+    setup, if given, runs untimed before every run (e.g. to clear caches).
+    """
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def peak_memory(function, setup=None):
+    """Peak memory allocated by one run of function, in bytes (setup runs first, untraced)."""
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(durations, rows=None):
+    """Median, best and throughput of a list of durations."""
+    summary = {
+        'median_s': statistics.median(durations),
+        'min_s': min(durations),
+        'repeat': len(durations),
+    }
+    if rows is not None:
+        summary['rows_per_s'] = rows / summary['median_s'] if summary['median_s'] else None
+    return summary
+
+
+def new_report(config):
+    """Empty JSON-ready report with the Python version, platform, time and benchmark config."""
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'config': config,
+        'results': [],
+    }
+
+
+def finish_report(report, output, failure=None):
+    """
+    Write the report as JSON to `output` (stdout if None).
+
+    If not every result is consistent, print `failure` and exit with status 1.
+    """
+    if output:
+        with open(output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Benchmark report saved as '{output}'", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if not all(result['consistent'] for result in report['results']):
+        print(failure or "Inconsistent benchmark results!", file=sys.stderr)
+        sys.exit(1)
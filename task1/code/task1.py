@@ -1,75 +1,187 @@
-def Infix2Postfix(Infix):
+import csv
+import os
+import re
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+
+# Define operator precedence
+PRECEDENCE = {
+    '~': 4,  # NOT (highest precedence)
+    '&': 3,  # AND
+    '|': 2,  # OR
+    '>': 1,  # IMPLIES
+    '=': 1   # IF AND ONLY IF (lowest precedence)
+}
+
+# Variable names: a letter or underscore followed by letters, digits or underscores
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def tokenize(Infix):
     """
-    Convert infix logical expression to postfix (Reverse Polish notation)
-    
-    Operators:
-    - "(": Open parenthesis
-    - "~": Not
-    - "&": And
-    - "|": Or
-    - ">": Implies
-    - "=": If and only if
-    - ")": Close parenthesis
+    Split an infix expression into variable names, operators and parentheses.
+
+    Whitespace is skipped. Any other character raises ValueError.
     """
-    # Define operator precedence
-    precedence = {
-        '~': 4,  # NOT (highest precedence)
-        '&': 3,  # AND
-        '|': 2,  # OR
-        '>': 1,  # IMPLIES
-        '=': 1   # IF AND ONLY IF (lowest precedence)
-    }
-    
-    # Initialize variables
-    postfix = ""
-    stack = []
-    
-    # Process each character in the infix expression
+    tokens = []
     i = 0
     while i < len(Infix):
         char = Infix[i]
+        if char.isspace():
+            i += 1
+        elif char in PRECEDENCE or char in '()':
+            tokens.append(char)
+            i += 1
+        else:
+            match = IDENTIFIER.match(Infix, i)
+            if not match:
+                raise ValueError(f"Unexpected character {char!r} at position {i} in {Infix!r}")
+            tokens.append(match.group())
+            i = match.end()
+    return tokens
+
+
+def is_operand(token):
+    """True for variable names, False for operators and parentheses."""
+    return token not in PRECEDENCE and token not in '()'
+
+
+@lru_cache(maxsize=4096)
+def _parse_tokens(tokens):
+    """Parse a tuple of infix tokens into a tuple of postfix tokens."""
+    postfix = []
+    stack = []
+    
+    # Between tokens we expect either an operand (a variable, '(' or '~')
+    # or an operator (a binary operator or ')')
+    expect_operand = True
+    
+    # Process each token in the infix expression
+    for position, token in enumerate(tokens):
+        if expect_operand != (is_operand(token) or token in '(~'):
+            raise ValueError(f"Unexpected {token!r} at token {position} in {' '.join(tokens)!r}")
         
-        # If the character is an operand (A-Z), add it to postfix
-        if 'A' <= char <= 'Z':
-            postfix += char
+        # If the token is an operand, add it to postfix
+        if is_operand(token):
+            postfix.append(token)
+            expect_operand = False
         
-        # If the character is '(', push it onto the stack
-        elif char == '(':
+        # If the token is '(', push it onto the stack
+        elif token == '(':
             stack.append('(')
         
-        # If the character is ')', pop operators from stack and add to postfix until '(' is encountered
-        elif char == ')':
+        # If the token is ')', pop operators from stack and add to postfix until '(' is encountered
+        elif token == ')':
             while stack and stack[-1] != '(':
-                postfix += stack.pop()
-            if stack and stack[-1] == '(':
-                stack.pop()  # Remove '(' from stack
-        
-        # If the character is an operator, handle according to precedence
-        elif char in precedence:
-            # For NOT operator, just push onto stack (right associative)
-            if char == '~':
-                stack.append(char)
-            else:
-                # For other operators, pop operators with higher or equal precedence
-                while stack and stack[-1] != '(' and stack[-1] in precedence and precedence[stack[-1]] >= precedence[char]:
-                    postfix += stack.pop()
-                stack.append(char)
+                postfix.append(stack.pop())
+            if not stack:
+                raise ValueError(f"Unbalanced ')' in {' '.join(tokens)!r}")
+            stack.pop()  # Remove '(' from stack
+        
+        # For NOT operator, just push onto stack (right associative)
+        elif token == '~':
+            stack.append(token)
         
-        i += 1
+        # For other operators, pop operators with higher or equal precedence
+        else:
+            while stack and stack[-1] != '(' and PRECEDENCE[stack[-1]] >= PRECEDENCE[token]:
+                postfix.append(stack.pop())
+            stack.append(token)
+            expect_operand = True
+    
+    if expect_operand:
+        raise ValueError(f"Missing operand at the end of {' '.join(tokens)!r}")
     
     # Pop remaining operators from stack and add to postfix
     while stack:
-        postfix += stack.pop()
+        token = stack.pop()
+        if token == '(':
+            raise ValueError(f"Unbalanced '(' in {' '.join(tokens)!r}")
+        postfix.append(token)
     
-    return postfix
+    return tuple(postfix)
+
+
+def parse_infix(Infix):
+    """
+    Parse an infix expression into a tuple of postfix tokens.
+
+    Malformed expressions raise ValueError. Results are cached by token, so
+    formulas that are submitted again (with any spacing) are not parsed again.
+    """
+    return _parse_tokens(tuple(tokenize(Infix)))
 
 
-def Postfix2Truthtable(Postfix):
+def postfix_string(tokens):
+    """
+    Join postfix tokens into a postfix string.
+
+    Single uppercase letters are joined without separators as before
+    ("PQ&"), any other variable names are separated by spaces ("x1 x2 &").
+    """
+    if all(len(token) == 1 and not ('a' <= token <= 'z' or token == '_') for token in tokens):
+        return "".join(tokens)
+    return " ".join(tokens)
+
+
+def postfix_tokens(Postfix):
+    """Split a postfix string (or token sequence) produced by Infix2Postfix into tokens."""
+    if not isinstance(Postfix, str):
+        return list(Postfix)
+    if any(char.isspace() for char in Postfix):
+        return Postfix.split()
+    # A single multi-character name, otherwise single-letter variables and operators
+    if IDENTIFIER.fullmatch(Postfix):
+        return [Postfix]
+    return list(Postfix)
+
+
+def Infix2Postfix(Infix):
+    """
+    Convert infix logical expression to postfix (Reverse Polish notation)
+    
+    Operands are variable names such as P, x12 or door_open.
+    
+    Operators:
+    - "(": Open parenthesis
+    - "~": Not
+    - "&": And
+    - "|": Or
+    - ">": Implies
+    - "=": If and only if
+    - ")": Close parenthesis
+    """
+    return postfix_string(parse_infix(Infix))
+
+
+def Postfix2Truthtable(Postfix, mode="row", workers=None):
     """
     Generate a truth table from a postfix expression
+
+    Modes:
+    - "row": Evaluate the expression once per row (reference implementation)
+    - "bitwise": Evaluate each operator once over all rows using bit vectors
+    - "compiled": Evaluate a precompiled Python function once per row
+    - "parallel": Evaluate blocks of rows with bit vectors on `workers` processes
     """
-    # Extract unique variables from the postfix expression (A-Z)
-    variables = sorted(set([char for char in Postfix if 'A' <= char <= 'Z']))
+    if mode == "bitwise":
+        return Postfix2TruthtableBitwise(Postfix)
+    if mode == "parallel":
+        return Postfix2TruthtableParallel(Postfix, workers)
+    if mode == "compiled":
+        return compile_postfix(Postfix).truth_table()
+    if mode != "row":
+        raise ValueError(f"Unknown truth table mode: {mode}")
+
+    if not isinstance(Postfix, str):
+        Postfix = postfix_string(Postfix)
+    tokens = postfix_tokens(Postfix)
+    
+    # Extract unique variables from the postfix expression
+    variables = postfix_variables(tokens)
     num_vars = len(variables)
     
     # Generate all possible combinations of True/False for variables
@@ -92,8 +204,8 @@ def Postfix2Truthtable(Postfix):
         
         # Evaluate the expression
         stack = []
-        for char in Postfix:
-            if 'A' <= char <= 'Z':
+        for char in tokens:
+            if is_operand(char):
                 stack.append(values[char])
             elif char == '~':
                 operand = stack.pop()
@@ -123,6 +235,954 @@ def Postfix2Truthtable(Postfix):
     return table
 
 
+def postfix_variables(Postfix):
+    """Sorted list of the variables used in a postfix expression."""
+    return sorted(set([token for token in postfix_tokens(Postfix) if is_operand(token)]))
+
+
+def variable_order(*Postfixes):
+    """
+    Variables of one or more postfix expressions in order of first appearance.
+
+    Variables that appear close together in a formula usually depend on each
+    other, so keeping them close in a BDD order keeps the BDD small where the
+    alphabetical order can blow up (a&x | b&y | c&z ordered a b c x y z).
+    """
+    order = {}
+    for Postfix in Postfixes:
+        for token in postfix_tokens(Postfix):
+            if is_operand(token):
+                order.setdefault(token, None)
+    return list(order)
+
+
+def variable_bitmask(position, num_vars, start=0, size=None):
+    """
+    Bit vector of a variable column over all 2^num_vars rows.
+
+    Bit i of the result is the value of the variable at position `position`
+    in row i, using the same ordering as Postfix2Truthtable (first variable
+    is the most significant bit of the row index).
+
+    If `size` is given, only the block of rows start .. start+size-1 is
+    covered and bit i stands for row start+i. The size must be a power of
+    two and start a multiple of it.
+    """
+    num_rows = 2 ** num_vars if size is None else size
+    all_rows = (1 << num_rows) - 1
+    half = 1 << (num_vars - 1 - position)
+    
+    # Columns that change slower than the block are constant inside it
+    if half >= num_rows:
+        return all_rows if (start >> (num_vars - 1 - position)) & 1 else 0
+    
+    # The column repeats a block of `half` False rows followed by `half` True rows,
+    # so row i is True exactly when i & half is set
+    if num_rows < 8:
+        return sum(1 << i for i in range(num_rows) if i & half)
+    
+    # Build one period (or one byte of short periods) and repeat it as bytes
+    if half < 8:
+        unit = bytes([sum(1 << i for i in range(8) if i & half)])
+    else:
+        unit = b'\x00' * (half // 8) + b'\xff' * (half // 8)
+    return int.from_bytes(unit * (num_rows // (8 * len(unit))), 'little')
+
+
+def Postfix2Bitmask(Postfix):
+    """
+    Evaluate a postfix expression over all rows at once.
+
+    Returns the sorted variables and an integer whose bit i is the value of
+    the expression in row i of the truth table.
+    """
+    compiled = compile_postfix(Postfix)
+    return compiled.variables, compiled.bitmask()
+
+
+def Postfix2TruthtableBitwise(Postfix):
+    """
+    Generate the same truth table as Postfix2Truthtable using bit vectors
+    """
+    variables, result = Postfix2Bitmask(Postfix)
+    return bitmask_to_truthtable(Postfix, variables, result)
+
+
+def bitmask_to_truthtable(Postfix, variables, result):
+    """Expand a result bit vector into the list-of-rows format of Postfix2Truthtable."""
+    num_vars = len(variables)
+    num_rows = 2 ** num_vars
+    if not isinstance(Postfix, str):
+        Postfix = postfix_string(Postfix)
+    
+    # Row i of the result is character i of the reversed binary string
+    result_bits = bin(result)[2:].zfill(num_rows)[::-1]
+    
+    table = [variables + [Postfix]]
+    for i in range(num_rows):
+        row = [bool((i >> (num_vars - 1 - j)) & 1) for j in range(num_vars)]
+        row.append(result_bits[i] == '1')
+        table.append(row)
+    
+    return table
+
+
+class ExpressionDAG:
+    """
+    Expression graph with shared subformulas.
+
+    Every node is an (operator, operands) pair kept in a unique table, so
+    identical subformulas become a single node. Operands of a variable are
+    its name, of a constant its value, and of an operator the child node
+    numbers. Children are always created before their parents.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.unique = {}
+
+    def add(self, operator, *operands):
+        """Return the node for (operator, operands), sharing identical nodes."""
+        key = (operator, operands)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = node
+        return node
+
+    def variable(self, name):
+        return self.add('var', name)
+
+    def constant(self, value):
+        return self.add('const', value)
+
+    def constant_value(self, node):
+        """Value of a constant node, or None for any other node."""
+        operator, operands = self.nodes[node]
+        return operands[0] if operator == 'const' else None
+
+    def is_negation(self, node, other):
+        """True if one node is the negation of the other."""
+        return self.nodes[node] == ('~', (other,)) or self.nodes[other] == ('~', (node,))
+
+    def negate(self, a):
+        """Node for ~a, removing double negations and folding constants."""
+        value = self.constant_value(a)
+        if value is not None:
+            return self.constant(not value)
+        operator, operands = self.nodes[a]
+        if operator == '~':
+            return operands[0]
+        return self.add('~', a)
+
+    def binary(self, operator, a, b):
+        """Node for a binary operator, folding constants and trivial identities."""
+        value_a = self.constant_value(a)
+        value_b = self.constant_value(b)
+        
+        if operator == '&':
+            if value_a is False or value_b is False or self.is_negation(a, b):
+                return self.constant(False)
+            if value_a is True or a == b:
+                return b
+            if value_b is True:
+                return a
+        elif operator == '|':
+            if value_a is True or value_b is True or self.is_negation(a, b):
+                return self.constant(True)
+            if value_a is False or a == b:
+                return b
+            if value_b is False:
+                return a
+        elif operator == '>':
+            if value_a is False or value_b is True or a == b:
+                return self.constant(True)
+            if value_a is True:
+                return b
+            if value_b is False or self.is_negation(a, b):
+                return self.negate(a)
+        elif operator == '=':
+            if a == b:
+                return self.constant(True)
+            if self.is_negation(a, b):
+                return self.constant(False)
+            if value_a is not None:
+                return b if value_a else self.negate(b)
+            if value_b is not None:
+                return a if value_b else self.negate(a)
+        else:
+            raise ValueError(f"Unknown operator: {operator}")
+        
+        # AND, OR and IFF are commutative, so order the operands to share P&Q and Q&P
+        if operator != '>' and a > b:
+            a, b = b, a
+        return self.add(operator, a, b)
+
+    def build(self, Postfix):
+        """Add a postfix expression to the graph and return its root node."""
+        stack = []
+        for token in postfix_tokens(Postfix):
+            if is_operand(token):
+                stack.append(self.variable(token))
+            elif token == '~':
+                stack.append(self.negate(stack.pop()))
+            else:
+                operand2 = stack.pop()
+                operand1 = stack.pop()
+                stack.append(self.binary(token, operand1, operand2))
+        return stack.pop()
+
+    def reachable(self, root):
+        """Nodes the root depends on (including itself), in creation order."""
+        seen = {root}
+        pending = [root]
+        while pending:
+            operator, operands = self.nodes[pending.pop()]
+            if operator in ('var', 'const'):
+                continue
+            for child in operands:
+                if child not in seen:
+                    seen.add(child)
+                    pending.append(child)
+        return sorted(seen)
+
+
+# Code templates for each operator, used when compiling expressions.
+# Boolean templates work on single True/False values, bitwise templates work
+# on integers holding one bit per truth table row.
+BOOLEAN_TEMPLATES = {
+    True: 'True',
+    False: 'False',
+    '~': 'not {0}',
+    '&': '{0} and {1}',
+    '|': '{0} or {1}',
+    '>': 'not {0} or {1}',
+    '=': '{0} == {1}'
+}
+
+BITWISE_TEMPLATES = {
+    True: 'all_rows',
+    False: '0',
+    '~': '{0} ^ all_rows',
+    '&': '{0} & {1}',
+    '|': '{0} | {1}',
+    '>': '{0} ^ all_rows | {1}',
+    '=': '{0} ^ {1} ^ all_rows'
+}
+
+
+def generate_source(dag, root, variables, templates, name, extra_args=()):
+    """
+    Translate an expression graph into the source of a Python function.
+
+    Every distinct subformula becomes one assignment to a temporary, so the
+    generated function is straight-line code with no dispatch, no nesting
+    and no repeated work.
+    """
+    # Variables are passed positionally as v0, v1, ... in sorted order
+    names = {variable: f"v{j}" for j, variable in enumerate(variables)}
+    args = [names[variable] for variable in variables] + list(extra_args)
+    
+    lines = [f"def {name}({', '.join(args)}):"]
+    values = {}
+    for node in dag.reachable(root):
+        operator, operands = dag.nodes[node]
+        if operator == 'var':
+            values[node] = names[operands[0]]
+            continue
+        if operator == 'const':
+            code = templates[operands[0]]
+        else:
+            code = templates[operator].format(*[values[child] for child in operands])
+        values[node] = f"t{len(lines) - 1}"
+        lines.append(f"    {values[node]} = {code}")
+    
+    lines.append(f"    return {values[root]}")
+    return "\n".join(lines)
+
+
+class CompiledExpression:
+    """
+    A postfix expression compiled once into Python functions.
+
+    The compiled object can be called on a single assignment, on a batch of
+    assignments, or asked for the whole truth table.
+    """
+
+    def __init__(self, Postfix):
+        self.postfix = Postfix
+        self.variables = postfix_variables(Postfix)
+        self.num_vars = len(self.variables)
+        self.num_rows = 2 ** self.num_vars
+        
+        # Share repeated subformulas and simplify before generating code
+        self.dag = ExpressionDAG()
+        self.root = self.dag.build(Postfix)
+        
+        # Generate and compile both versions of the expression
+        self.source = generate_source(self.dag, self.root, self.variables, BOOLEAN_TEMPLATES, "evaluate")
+        self.bitwise_source = generate_source(self.dag, self.root, self.variables, BITWISE_TEMPLATES,
+                                              "evaluate_bits", extra_args=("all_rows",))
+        namespace = {}
+        exec(self.source, namespace)
+        exec(self.bitwise_source, namespace)
+        self.function = namespace["evaluate"]
+        self.bitwise_function = namespace["evaluate_bits"]
+
+    def __call__(self, assignment):
+        """Evaluate one assignment, given as a dict or a sequence of values in variable order."""
+        if isinstance(assignment, dict):
+            return self.function(*[assignment[variable] for variable in self.variables])
+        return self.function(*assignment)
+
+    def evaluate_batch(self, assignments):
+        """Evaluate a batch of assignments and return the results in order."""
+        return [self(assignment) for assignment in assignments]
+
+    def evaluate_row(self, i):
+        """Evaluate row i of the truth table."""
+        return self.function(*[bool((i >> (self.num_vars - 1 - j)) & 1) for j in range(self.num_vars)])
+
+    def bitmask(self):
+        """Evaluate every row at once, bit i of the result is the value of row i."""
+        masks = [variable_bitmask(j, self.num_vars) for j in range(self.num_vars)]
+        return self.bitwise_function(*masks, (1 << self.num_rows) - 1)
+
+    def block_bitmask(self, start, size):
+        """Evaluate rows start .. start+size-1 at once, bit i is the value of row start+i."""
+        masks = [variable_bitmask(j, self.num_vars, start, size) for j in range(self.num_vars)]
+        return self.bitwise_function(*masks, (1 << size) - 1)
+
+    def truth_table(self):
+        """Generate the same table as Postfix2Truthtable by calling the compiled function per row."""
+        table = [self.variables + [self.postfix]]
+        for i in range(self.num_rows):
+            row = [bool((i >> (self.num_vars - 1 - j)) & 1) for j in range(self.num_vars)]
+            row.append(self.function(*row))
+            table.append(row)
+        return table
+
+
+def compile_postfix(Postfix):
+    """Compile a postfix expression (string or tokens), reusing the result for repeated formulas."""
+    if not isinstance(Postfix, str):
+        Postfix = postfix_string(Postfix)
+    return _compile_cached(Postfix)
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached(Postfix):
+    return CompiledExpression(Postfix)
+
+
+def evaluate_block(Postfix, start, size):
+    """Evaluate one block of rows, returned as little-endian bytes if the block fills whole bytes."""
+    result = compile_postfix(Postfix).block_bitmask(start, size)
+    if size % 8 == 0:
+        return result.to_bytes(size // 8, 'little')
+    return result
+
+
+# Smallest default block for Postfix2BitmaskParallel; below this, starting
+# processes and pickling jobs costs more than evaluating the rows
+MIN_PARALLEL_BLOCK = 1 << 16
+
+
+def Postfix2BitmaskParallel(Postfix, workers=None, block_size=None):
+    """
+    Evaluate a postfix expression over all rows using several processes.
+
+    The rows are split into contiguous blocks that are evaluated in a process
+    pool and joined back in order. Returns the same (variables, result) pair
+    as Postfix2Bitmask. By default each worker gets about four blocks of at
+    least MIN_PARALLEL_BLOCK rows, so small tables never start a pool.
+    """
+    compiled = compile_postfix(Postfix)
+    num_rows = compiled.num_rows
+    workers = workers or os.cpu_count() or 1
+    
+    if block_size is None:
+        # Largest power of two giving at least four blocks per worker, but never
+        # below MIN_PARALLEL_BLOCK rows: smaller tables are evaluated in-process
+        block_size = 1 << max((num_rows // (4 * workers)).bit_length() - 1, 0)
+        block_size = max(block_size, MIN_PARALLEL_BLOCK)
+    elif block_size < 1 or block_size & (block_size - 1):
+        raise ValueError(f"Block size must be a power of two: {block_size}")
+    size = min(block_size, num_rows)
+    
+    # A single block is not worth starting processes for
+    if workers == 1 or size == num_rows:
+        return compiled.variables, compiled.bitmask()
+    
+    starts = range(0, num_rows, size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        blocks = list(executor.map(evaluate_block, [Postfix] * len(starts), starts, [size] * len(starts)))
+    
+    # Whole-byte blocks can be concatenated, otherwise shift each block into place
+    if size % 8 == 0:
+        return compiled.variables, int.from_bytes(b''.join(blocks), 'little')
+    result = 0
+    for start, block in zip(starts, blocks):
+        result |= block << start
+    return compiled.variables, result
+
+
+def Postfix2TruthtableParallel(Postfix, workers=None):
+    """
+    Generate the same truth table as Postfix2Truthtable on several processes
+    """
+    variables, result = Postfix2BitmaskParallel(Postfix, workers)
+    return bitmask_to_truthtable(Postfix, variables, result)
+
+
+class CompactTruthTable:
+    """
+    Truth table that stores only the result column as a packed bitset.
+
+    Bit i of `bits` (little-endian) is the value of the expression in row i.
+    Variable values are derived from the row index when a row is accessed,
+    so the table takes 2^n bits instead of 2^n lists of n+1 values.
+    """
+
+    MAGIC = b"TTBL"
+    VERSION = 2
+    # Magic, version, number of variables, length of the postfix expression
+    HEADER = struct.Struct("<4sBHI")
+    # Length prefix of each variable name, by file version (version 1 allowed only 255 bytes)
+    NAME_LENGTH = {1: struct.Struct("<B"), 2: struct.Struct("<H")}
+
+    def __init__(self, Postfix, variables, bits):
+        self.postfix = Postfix
+        self.variables = list(variables)
+        self.num_vars = len(self.variables)
+        self.num_rows = 2 ** self.num_vars
+        self.bits = bytes(bits)
+
+    @classmethod
+    def from_postfix(cls, Postfix, workers=None):
+        """Evaluate a postfix expression into a compact table, on several processes if workers > 1."""
+        if workers is not None and workers > 1:
+            variables, result = Postfix2BitmaskParallel(Postfix, workers)
+        else:
+            variables, result = Postfix2Bitmask(Postfix)
+        num_bytes = (2 ** len(variables) + 7) // 8
+        Postfix = compile_postfix(Postfix).postfix
+        return cls(Postfix, variables, result.to_bytes(num_bytes, 'little'))
+
+    def __len__(self):
+        return self.num_rows
+
+    def value(self, i):
+        """Value of the expression in row i."""
+        return bool((self.bits[i >> 3] >> (i & 7)) & 1)
+
+    def __getitem__(self, i):
+        """Row i in the same format as the rows of Postfix2Truthtable."""
+        if i < 0:
+            i += self.num_rows
+        if not 0 <= i < self.num_rows:
+            raise IndexError("truth table row out of range")
+        row = [bool((i >> (self.num_vars - 1 - j)) & 1) for j in range(self.num_vars)]
+        row.append(self.value(i))
+        return row
+
+    def __iter__(self):
+        for i in range(self.num_rows):
+            yield self[i]
+
+    def header(self):
+        return self.variables + [self.postfix]
+
+    def count_true(self):
+        """Number of rows where the expression is True (minterms)."""
+        return bin(int.from_bytes(self.bits, 'little')).count('1')
+
+    def minterms(self):
+        """Indices of the rows where the expression is True."""
+        for byte_index, byte in enumerate(self.bits):
+            # Skip whole bytes of False rows
+            if byte:
+                for bit in range(8):
+                    if (byte >> bit) & 1:
+                        yield byte_index * 8 + bit
+
+    def to_list(self):
+        """Convert back to the list-of-lists format returned by Postfix2Truthtable."""
+        return [self.header()] + list(self)
+
+    def save(self, filename):
+        """Write the table to a compact binary file."""
+        postfix = self.postfix.encode('utf-8')
+        names = [variable.encode('utf-8') for variable in self.variables]
+        name_length = self.NAME_LENGTH[self.VERSION]
+        
+        # Check the limits of the format before writing anything
+        if len(postfix) >= 2 ** 32:
+            raise ValueError("Postfix expression too long to save (4 GiB at most)")
+        for name in names:
+            if len(name) >= 2 ** (8 * name_length.size):
+                raise ValueError(f"Variable name too long to save ({len(name)} bytes): {name[:32]!r}...")
+        
+        with open(filename, 'wb') as file:
+            file.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.num_vars, len(postfix)))
+            file.write(postfix)
+            for name in names:
+                file.write(name_length.pack(len(name)) + name)
+            file.write(self.bits)
+        return filename
+
+    @classmethod
+    def load(cls, filename):
+        """Read a table written by save()."""
+        with open(filename, 'rb') as file:
+            data = file.read()
+        
+        if len(data) < cls.HEADER.size:
+            raise ValueError(f"Not a truth table file: {filename}")
+        magic, version, num_vars, postfix_length = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version not in cls.NAME_LENGTH:
+            raise ValueError(f"Not a truth table file: {filename}")
+        name_length = cls.NAME_LENGTH[version]
+        offset = cls.HEADER.size
+        if offset + postfix_length > len(data):
+            raise ValueError(f"Truncated truth table file: {filename}")
+        Postfix = data[offset:offset + postfix_length].decode('utf-8')
+        offset += postfix_length
+        
+        variables = []
+        for _ in range(num_vars):
+            if offset + name_length.size > len(data):
+                raise ValueError(f"Truncated truth table file: {filename}")
+            (length,) = name_length.unpack_from(data, offset)
+            offset += name_length.size
+            if offset + length > len(data):
+                raise ValueError(f"Truncated truth table file: {filename}")
+            variables.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+        
+        bits = data[offset:]
+        if len(bits) != (2 ** num_vars + 7) // 8:
+            raise ValueError(f"Truncated truth table file: {filename}")
+        return cls(Postfix, variables, bits)
+
+
+def iter_truth_table_blocks(Postfix, block_size=4096):
+    """
+    Lazily generate the rows of the truth table in blocks.
+
+    Yields lists of at most block_size rows (without the header), each row
+    in the same format as Postfix2Truthtable. Only one block is held in
+    memory at a time. block_size must be a power of two.
+    """
+    if block_size < 1 or block_size & (block_size - 1):
+        raise ValueError(f"Block size must be a power of two: {block_size}")
+    
+    compiled = compile_postfix(Postfix)
+    num_vars = compiled.num_vars
+    size = min(block_size, compiled.num_rows)
+    shifts = [num_vars - 1 - j for j in range(num_vars)]
+    
+    for start in range(0, compiled.num_rows, size):
+        # Evaluate the whole block at once, then unpack it row by row
+        result_bits = bin(compiled.block_bitmask(start, size))[2:].zfill(size)[::-1]
+        block = []
+        for offset in range(size):
+            i = start + offset
+            row = [bool((i >> shift) & 1) for shift in shifts]
+            row.append(result_bits[offset] == '1')
+            block.append(row)
+        yield block
+
+
+def iter_truth_table(Postfix, block_size=4096):
+    """Lazily generate the rows of the truth table one at a time (without the header)."""
+    for block in iter_truth_table_blocks(Postfix, block_size):
+        yield from block
+
+
+def truth_table_header(Postfix):
+    """Header row of the truth table: the variables followed by the expression."""
+    compiled = compile_postfix(Postfix)
+    return compiled.variables + [compiled.postfix]
+
+
+def print_truth_table_stream(Postfix, block_size=4096, file=None):
+    """
+    Print the truth table block by block without building it in memory.
+
+    Produces the same output as print_truth_table. Cells are single letters,
+    so the column widths are known from the header alone.
+    """
+    file = file or sys.stdout
+    header = truth_table_header(Postfix)
+    col_widths = [max(len(name), 1) for name in header]
+    
+    header_str = ' | '.join(name.center(col_widths[j]) for j, name in enumerate(header))
+    print(header_str, file=file)
+    print('-' * len(header_str), file=file)
+    
+    # Pre-center the two possible cell values for every column
+    cells = [{True: 'T'.center(width), False: 'F'.center(width)} for width in col_widths]
+    for block in iter_truth_table_blocks(Postfix, block_size):
+        lines = [' | '.join(cells[j][value] for j, value in enumerate(row)) for row in block]
+        file.write('\n'.join(lines) + '\n')
+
+
+def write_truth_table_csv(Postfix, filename, block_size=4096):
+    """Stream the truth table to a CSV file, using T/F for the values."""
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(truth_table_header(Postfix))
+        for block in iter_truth_table_blocks(Postfix, block_size):
+            writer.writerows(['T' if value else 'F' for value in row] for row in block)
+    return filename
+
+
+# Largest BDD the check_* functions build before switching to a DPLL search
+BDD_NODE_BUDGET = 1 << 20
+
+
+class NodeBudgetExceeded(Exception):
+    """Raised when a BDD needs more nodes than its budget allows."""
+
+
+class BDD:
+    """
+    Reduced ordered binary decision diagram (ROBDD) manager.
+
+    Nodes are integers: 0 is False, 1 is True, and every other node is a
+    (level, low, high) triple stored in a unique table, so two equal
+    functions are always the same node. Levels follow the order of
+    `variables`. With `max_nodes` set, creating more nodes than that raises
+    NodeBudgetExceeded.
+    """
+
+    def __init__(self, variables, max_nodes=None):
+        self.variables = list(variables)
+        self.levels = {variable: level for level, variable in enumerate(self.variables)}
+        self.max_nodes = max_nodes
+        
+        # Terminals sit below every variable level
+        terminal_level = len(self.variables)
+        self.nodes = [(terminal_level, 0, 0), (terminal_level, 1, 1)]
+        self.unique = {}
+        self.ite_cache = {}
+
+    def make_node(self, level, low, high):
+        """Return the node for (level, low, high), sharing identical nodes."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            if self.max_nodes is not None and len(self.nodes) >= self.max_nodes:
+                raise NodeBudgetExceeded(f"BDD needs more than {self.max_nodes} nodes")
+            node = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = node
+        return node
+
+    def variable(self, name):
+        """Node for a single variable."""
+        return self.make_node(self.levels[name], 0, 1)
+
+    def cofactors(self, node, level):
+        """Low and high branches of a node with respect to the variable at `level`."""
+        node_level, low, high = self.nodes[node]
+        if node_level != level:
+            return node, node
+        return low, high
+
+    def ite_terminal(self, f, g, h):
+        """Result of ite(f, g, h) when it needs no split, otherwise None."""
+        if f == 1:
+            return g
+        if f == 0:
+            return h
+        if g == h:
+            return g
+        if g == 1 and h == 0:
+            return f
+        return self.ite_cache.get((f, g, h))
+
+    def ite(self, f, g, h):
+        """If-then-else: the node for (f and g) or (not f and h)."""
+        # An explicit stack instead of recursion, which would go one call deep
+        # per variable level and hit the recursion limit on large formulas
+        results = []
+        stack = [(f, g, h, None)]
+        while stack:
+            f, g, h, level = stack.pop()
+            if level is not None:
+                # Both branches are done: combine them
+                high = results.pop()
+                low = results.pop()
+                result = self.make_node(level, low, high)
+                self.ite_cache[(f, g, h)] = result
+                results.append(result)
+                continue
+            
+            result = self.ite_terminal(f, g, h)
+            if result is not None:
+                results.append(result)
+                continue
+            
+            # Split on the top-most variable of the three operands
+            level = min(self.nodes[f][0], self.nodes[g][0], self.nodes[h][0])
+            f0, f1 = self.cofactors(f, level)
+            g0, g1 = self.cofactors(g, level)
+            h0, h1 = self.cofactors(h, level)
+            stack.append((f, g, h, level))
+            stack.append((f1, g1, h1, None))
+            stack.append((f0, g0, h0, None))
+        return results.pop()
+
+    def apply(self, operator, f, g=None):
+        """Apply one of the operators ~ & | > = to BDD nodes."""
+        if operator == '~':
+            return self.ite(f, 0, 1)
+        if operator == '&':
+            return self.ite(f, g, 0)
+        if operator == '|':
+            return self.ite(f, 1, g)
+        if operator == '>':
+            return self.ite(f, g, 1)
+        if operator == '=':
+            return self.ite(f, g, self.ite(g, 0, 1))
+        raise ValueError(f"Unknown operator: {operator}")
+
+    def build(self, Postfix):
+        """Build the node for a postfix expression, once per distinct subformula."""
+        dag = ExpressionDAG()
+        root = dag.build(Postfix)
+        
+        nodes = {}
+        for node in dag.reachable(root):
+            operator, operands = dag.nodes[node]
+            if operator == 'var':
+                nodes[node] = self.variable(operands[0])
+            elif operator == 'const':
+                nodes[node] = 1 if operands[0] else 0
+            else:
+                nodes[node] = self.apply(operator, *[nodes[child] for child in operands])
+        return nodes[root]
+
+    def satisfying_assignment(self, node):
+        """
+        Return one assignment that makes the node True, or None if there is none.
+
+        Variables that do not matter on the chosen path are set to False.
+        """
+        if node == 0:
+            return None
+        assignment = {variable: False for variable in self.variables}
+        
+        # In a reduced BDD every path that avoids the False terminal ends in True
+        while node > 1:
+            level, low, high = self.nodes[node]
+            if high != 0:
+                assignment[self.variables[level]] = True
+                node = high
+            else:
+                node = low
+        return assignment
+
+    def count_models(self, node):
+        """Number of assignments of all variables that make the node True."""
+        counts = {0: 0, 1: 1}
+        
+        # Children before parents, with an explicit stack instead of recursion
+        stack = [node]
+        while stack:
+            n = stack[-1]
+            if n in counts:
+                stack.pop()
+                continue
+            level, low, high = self.nodes[n]
+            missing = [child for child in (low, high) if child not in counts]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            # Assignments of the variables from this node's level downwards
+            counts[n] = (counts[low] * 2 ** (self.nodes[low][0] - level - 1) +
+                         counts[high] * 2 ** (self.nodes[high][0] - level - 1))
+        
+        return counts[node] * 2 ** self.nodes[node][0]
+
+
+def tseitin_clauses(dag, root):
+    """
+    Clauses that can all be satisfied exactly when the DAG node `root` can be True.
+
+    Every node n gets its own variable, written as literal n + 1 (True) or
+    -(n + 1) (False), and clauses that tie it to its operands, so the clause
+    count stays linear in the size of the formula.
+    """
+    clauses = [[root + 1]]
+    for node in dag.reachable(root):
+        operator, operands = dag.nodes[node]
+        g = node + 1
+        if operator == 'var':
+            continue
+        if operator == 'const':
+            clauses.append([g if operands[0] else -g])
+        elif operator == '~':
+            a = operands[0] + 1
+            clauses += [[-g, -a], [g, a]]
+        else:
+            a, b = operands[0] + 1, operands[1] + 1
+            if operator == '&':
+                clauses += [[-g, a], [-g, b], [g, -a, -b]]
+            elif operator == '|':
+                clauses += [[g, -a], [g, -b], [-g, a, b]]
+            elif operator == '>':
+                clauses += [[g, a], [g, -b], [-g, -a, b]]
+            else:
+                clauses += [[-g, -a, b], [-g, a, -b], [g, a, b], [g, -a, -b]]
+    return clauses
+
+
+def dpll_satisfying_assignment(Postfix):
+    """
+    Return one assignment that makes a postfix expression True, or None if there is none.
+
+    A DPLL search over the Tseitin clauses of the expression: decide one
+    variable at a time (the expression's own variables first), propagate unit
+    clauses and backtrack chronologically on a conflict. Memory stays linear
+    in the formula, so this is the fallback when a BDD grows too large.
+    """
+    dag = ExpressionDAG()
+    root = dag.build(Postfix)
+    clauses = tseitin_clauses(dag, root)
+    
+    occurrences = {}
+    for clause in clauses:
+        for literal in clause:
+            occurrences.setdefault(literal, []).append(clause)
+    
+    reachable = dag.reachable(root)
+    inputs = [node for node in reachable if dag.nodes[node][0] == 'var']
+    order = [node + 1 for node in inputs] + [node + 1 for node in reachable if dag.nodes[node][0] != 'var']
+    
+    values = {}
+    trail = []
+    
+    def assign(literal):
+        values[abs(literal)] = literal > 0
+        trail.append(literal)
+    
+    def propagate(position):
+        """Assign every literal forced by the assignments from trail[position] on; False on a conflict."""
+        while position < len(trail):
+            false_literal = -trail[position]
+            position += 1
+            for clause in occurrences.get(false_literal, ()):
+                free = None
+                count = 0
+                for literal in clause:
+                    value = values.get(abs(literal))
+                    if value is None:
+                        free = literal
+                        count += 1
+                    elif value == (literal > 0):
+                        break
+                else:
+                    if count == 0:
+                        return False
+                    if count == 1:
+                        assign(free)
+        return True
+    
+    # Unit clauses: the root and any constants
+    for clause in clauses:
+        if len(clause) == 1:
+            literal = clause[0]
+            value = values.get(abs(literal))
+            if value is None:
+                assign(literal)
+            elif value != (literal > 0):
+                return None
+    
+    # Each decision is (trail length before it, literal tried, whether it is the second try)
+    decisions = []
+    consistent = propagate(0)
+    while True:
+        if consistent:
+            variable = next((variable for variable in order if variable not in values), None)
+            if variable is None:
+                break
+            decisions.append((len(trail), -variable, False))
+            assign(-variable)
+        else:
+            # Undo decisions until one still has its other value to try
+            while decisions and decisions[-1][2]:
+                decisions.pop()
+            if not decisions:
+                return None
+            size, literal, _ = decisions.pop()
+            for undone in trail[size:]:
+                del values[abs(undone)]
+            del trail[size:]
+            decisions.append((size, -literal, True))
+            assign(-literal)
+        consistent = propagate(decisions[-1][0])
+    
+    # Variables folded away by the DAG do not matter; set them to False like the BDD does
+    assignment = {variable: False for variable in variable_order(Postfix)}
+    for node in inputs:
+        assignment[dag.nodes[node][1][0]] = values[node + 1]
+    return assignment
+
+
+def check_satisfiable(Postfix, max_nodes=BDD_NODE_BUDGET):
+    """
+    Decide whether a postfix expression can be True.
+
+    Returns (satisfiable, witness) where witness is an assignment making the
+    expression True, or None. Uses a BDD of at most `max_nodes` nodes, and a
+    DPLL search if that is not enough.
+    """
+    try:
+        bdd = BDD(variable_order(Postfix), max_nodes)
+        witness = bdd.satisfying_assignment(bdd.build(Postfix))
+    except NodeBudgetExceeded:
+        witness = dpll_satisfying_assignment(Postfix)
+    return witness is not None, witness
+
+
+def check_tautology(Postfix, max_nodes=BDD_NODE_BUDGET):
+    """
+    Decide whether a postfix expression is True in every row.
+
+    Returns (tautology, counterexample) where counterexample is an assignment
+    making the expression False, or None.
+    """
+    try:
+        bdd = BDD(variable_order(Postfix), max_nodes)
+        counterexample = bdd.satisfying_assignment(bdd.apply('~', bdd.build(Postfix)))
+    except NodeBudgetExceeded:
+        counterexample = dpll_satisfying_assignment(postfix_tokens(Postfix) + ['~'])
+    return counterexample is None, counterexample
+
+
+def check_equivalent(Postfix1, Postfix2, max_nodes=BDD_NODE_BUDGET):
+    """
+    Decide whether two postfix expressions have the same value in every row.
+
+    Returns (equivalent, counterexample) where counterexample is an assignment
+    on which the two expressions differ, or None.
+    """
+    try:
+        bdd = BDD(variable_order(Postfix1, Postfix2), max_nodes)
+        difference = bdd.apply('~', bdd.apply('=', bdd.build(Postfix1), bdd.build(Postfix2)))
+        counterexample = bdd.satisfying_assignment(difference)
+    except NodeBudgetExceeded:
+        counterexample = dpll_satisfying_assignment(postfix_tokens(Postfix1) + postfix_tokens(Postfix2) + ['=', '~'])
+    return counterexample is None, counterexample
+
+
 # Helper function to print truth table in a readable format
 def print_truth_table(table):
     # Convert boolean values to T/F for better readability
@@ -166,8 +1226,18 @@ def main():
         postfix = Infix2Postfix(test_case)
         print(f"Postfix: {postfix}")
         truth_table = Postfix2Truthtable(postfix)
+        # The bitwise engine must agree with the reference engine row for row
+        assert Postfix2Truthtable(postfix, mode="bitwise") == truth_table
+        assert Postfix2Truthtable(postfix, mode="compiled") == truth_table
+        assert Postfix2Truthtable(postfix, mode="parallel", workers=2) == truth_table
         print("Truth Table:")
         print_truth_table(truth_table)
+        
+        # Answer the same questions without enumerating the table
+        tautology, counterexample = check_tautology(postfix)
+        satisfiable, witness = check_satisfiable(postfix)
+        print(f"Tautology: {tautology}" + (f" (False when {counterexample})" if counterexample else ""))
+        print(f"Satisfiable: {satisfiable}" + (f" (True when {witness})" if witness else ""))
 
 
 if __name__ == "__main__":
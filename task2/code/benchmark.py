@@ -0,0 +1,184 @@
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+import task2
+# task2 puts task1/code on sys.path, where the shared benchmark helpers live
+from benchmark_utils import finish_report, new_report, peak_memory, summarize, time_function
+
+
+# Fixed reference date so the same seed always gives the same dataset
+REFERENCE_DATE = date(2025, 1, 1)
+
+# Per-student predicates, timed over every record
+PREDICATES = {
+    'is_passing': task2.is_passing,
+    'is_high_math': task2.is_high_math,
+    'is_struggling': task2.is_struggling,
+    'improved_in_cs': task2.improved_in_cs,
+    'has_math_above_3': task2.has_math_above_3,
+    'has_subject_above_6': task2.has_subject_above_6,
+    'has_cs_or_eng_above_6': task2.has_cs_or_eng_above_6,
+    'is_below_6_in_math': task2.is_below_6_in_math,
+}
+
+# Column-wise predicates, timed over whole columns
+VECTORIZED_PREDICATES = {
+    'is_passing': task2.is_passing_vectorized,
+    'is_high_math': task2.is_high_math_vectorized,
+    'is_struggling': task2.is_struggling_vectorized,
+    'improved_in_cs': task2.improved_in_cs_vectorized,
+}
+
+# Each loader maps a CSV filename to the loaded students
+LOADERS = {
+    'csv': lambda filename: task2.load_student_data(filename),
+    'columns': lambda filename: task2.load_student_columns(filename),
+    'cache': lambda filename: task2.load_student_columns(filename, cache=True),
+}
+
+
+def measure(function, repeat, rows, measure_memory):
+    """Summary of `repeat` timed runs of function, plus its peak memory."""
+    summary = summarize(time_function(function, repeat), rows)
+    if measure_memory:
+        summary['peak_bytes'] = peak_memory(function)
+    return summary
+
+
+def statement_profile(students, repeat, fused=False):
+    """Per-statement timings collected with the evaluate_all_statements hook.
+
+    Each statement gets its median time over `repeat` runs and its share of
+    the total, so the statements that dominate stand out.
+    """
+    timings = {}
+
+    def hook(name, func, result, seconds):
+        timings.setdefault(name, []).append(seconds)
+
+    for _ in range(repeat):
+        # evaluate_all_statements prints every result; keep the report clean
+        with contextlib.redirect_stdout(io.StringIO()):
+            task2.evaluate_all_statements(students, fused=fused, hook=hook)
+
+    medians = {name: statistics.median(durations) for name, durations in timings.items()}
+    total = sum(medians.values())
+    return {name: {'median_s': median, 'share': median / total if total else None}
+            for name, median in medians.items()}
+
+
+def benchmark_size(num_records, directory, repeat, seed, workers=None, max_record_rows=10**6,
+                   measure_memory=True):
+    """Generate one dataset and time loading, predicates and statements on it."""
+    filename = os.path.join(directory, f"students-{num_records}.csv")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        task2.generate_student_dataset_fast(num_records, filename, seed=seed, workers=workers,
+                                            reference_date=REFERENCE_DATE)
+    result = {
+        'rows': num_records,
+        'file_bytes': os.path.getsize(filename),
+        'generate_s': time.perf_counter() - start,
+        'load': {},
+        'predicates': {},
+        'statements': {},
+        'profile': {},
+    }
+
+    # Per-record (list of dicts) work is too slow and too big past a few million rows
+    records = num_records <= max_record_rows
+
+    # Build the column cache once, so 'cache' times a warm memory-mapped open
+    task2.load_student_columns(filename, cache=True)
+    for name, loader in LOADERS.items():
+        if name == 'csv' and not records:
+            continue
+        result['load'][name] = measure(lambda: loader(filename), repeat, num_records, measure_memory)
+
+    columns = task2.load_student_columns(filename)
+    datasets = {'columns': (columns, VECTORIZED_PREDICATES, task2.VECTORIZED)}
+    if records:
+        students = task2.load_student_data(filename)
+        datasets['records'] = (students, PREDICATES, None)
+
+    for layout, (data, predicates, statements) in datasets.items():
+        result['predicates'][layout] = {}
+        for name, predicate in predicates.items():
+            if layout == 'records':
+                function = lambda: list(map(predicate, data))
+            else:
+                function = lambda: predicate(data)
+            result['predicates'][layout][name] = measure(function, repeat, num_records, measure_memory)
+
+        result['statements'][layout] = {}
+        for name, func in task2.STATEMENTS:
+            func = statements[func] if statements else func
+            result['statements'][layout][name] = measure(lambda: func(data), repeat, num_records,
+                                                         measure_memory)
+
+        result['profile'][layout] = statement_profile(data, repeat)
+
+    if records:
+        result['profile']['fused'] = statement_profile(students, repeat, fused=True)
+
+    # Check that every layout agrees on every statement
+    answers = {layout: tuple((statements[func] if statements else func)(data) for _, func in task2.STATEMENTS)
+               for layout, (data, _, statements) in datasets.items()}
+    result['consistent'] = len(set(answers.values())) == 1
+    return result
+
+
+def run_benchmarks(sizes, repeat, seed=0, workers=None, max_record_rows=10**6, measure_memory=True,
+                   directory=None):
+    """Benchmark every dataset size and return a JSON-ready report."""
+    report = new_report({
+        'sizes': sizes,
+        'repeat': repeat,
+        'seed': seed,
+        'workers': workers,
+        'max_record_rows': max_record_rows,
+    })
+
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        for num_records in sizes:
+            result = benchmark_size(num_records, workdir, repeat, seed, workers, max_record_rows,
+                                    measure_memory)
+            report['results'].append(result)
+
+            slowest = max(result['profile']['columns'].items(), key=lambda item: item[1]['median_s'])
+            loads = " ".join(f"{name}={summary['median_s']:.4f}s" for name, summary in result['load'].items())
+            print(f"rows={num_records:>10d} {loads} slowest statement={slowest[0]} "
+                  f"({slowest[1]['share']:.0%}) consistent={result['consistent']}", file=sys.stderr)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark task2 loading and statement evaluation")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**3, 10**4, 10**5, 10**6],
+                        help="dataset sizes to benchmark (up to 10^7)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per measurement")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="processes for dataset generation")
+    parser.add_argument('--max-record-rows', type=int, default=10**6,
+                        help="skip list-of-dict loading and evaluation above this many rows")
+    parser.add_argument('--no-memory', action='store_true', help="skip peak memory measurement")
+    parser.add_argument('--tmpdir', default=None, help="directory for the generated datasets")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.repeat, args.seed, args.workers, args.max_record_rows,
+                            not args.no_memory, args.tmpdir)
+
+    finish_report(report, args.output, "Records and columns disagree on at least one statement!")
+
+
+if __name__ == "__main__":
+    main()
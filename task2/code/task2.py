@@ -1,21 +1,47 @@
 import csv
+import json
+import mmap
+import os
 import random
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import re
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from itertools import compress, repeat
+from multiprocessing import Manager
+from operator import and_, eq, ge, gt, le, lt, ne
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Sequence, Tuple
+
+# The query language reuses the logical expression parser from task1
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'task1', 'code'))
+from task1 import parse_infix
+
+
+# Headers for the CSV file
+HEADERS = ["StudentID", "StudentName", "DayOfBirth", "Math", "CS", "Eng"]
+
+# Lists for generating random names
+FIRST_NAMES = ["John", "Emma", "Michael", "Sophia", "William", "Olivia", "James", "Ava", 
+               "Alexander", "Isabella", "Benjamin", "Mia", "Elijah", "Charlotte", "Daniel", 
+               "Amelia", "Matthew", "Harper", "David", "Evelyn"]
+
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Jones", "Brown", "Davis", "Miller", "Wilson", 
+              "Moore", "Taylor", "Anderson", "Thomas", "Jackson", "White", "Harris", "Martin", 
+              "Thompson", "Garcia", "Martinez", "Robinson"]
+
 
 def generate_student_dataset(num_records=20, filename="students.csv"):
     """Generate a student dataset with random data and save to CSV"""
-    # Headers for the CSV file
-    headers = ["StudentID", "StudentName", "DayOfBirth", "Math", "CS", "Eng"]
-    
-    # Lists for generating random names
-    first_names = ["John", "Emma", "Michael", "Sophia", "William", "Olivia", "James", "Ava", 
-                  "Alexander", "Isabella", "Benjamin", "Mia", "Elijah", "Charlotte", "Daniel", 
-                  "Amelia", "Matthew", "Harper", "David", "Evelyn"]
-    
-    last_names = ["Smith", "Johnson", "Williams", "Jones", "Brown", "Davis", "Miller", "Wilson", 
-                 "Moore", "Taylor", "Anderson", "Thomas", "Jackson", "White", "Harris", "Martin", 
-                 "Thompson", "Garcia", "Martinez", "Robinson"]
+    headers = HEADERS
+    first_names = FIRST_NAMES
+    last_names = LAST_NAMES
     
     # Generate random student data
     students = []
@@ -58,20 +84,45 @@ def generate_student_dataset(num_records=20, filename="students.csv"):
     return filename
 
 
-def load_student_data(filename: str) -> List[Dict[str, Any]]:
-    """Load student data from a CSV file into a list of dictionaries."""
+def parse_student_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert the score fields of a CSV row to float."""
+    row['Math'] = float(row['Math'])
+    row['CS'] = float(row['CS'])
+    row['Eng'] = float(row['Eng'])
+    return row
+
+
+def load_student_data(filename: str, cache: bool = False) -> List[Dict[str, Any]]:
+    """Load student data from a CSV file into a list of dictionaries.
+
+    With cache=True the records are built from the binary column cache
+    (see load_student_columns) instead of parsing the CSV again.
+    """
+    if cache:
+        return list(load_student_columns(filename, cache=True).records())
     students = []
     with open(filename, 'r') as file:
         reader = csv.DictReader(file)
         for row in reader:
             # Convert scores to float
-            row['Math'] = float(row['Math'])
-            row['CS'] = float(row['CS'])
-            row['Eng'] = float(row['Eng'])
-            students.append(row)
+            students.append(parse_student_row(row))
     return students
 
 
+def iter_student_chunks(filename: str, chunk_size: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+    """Lazily read student data from a CSV file in lists of at most chunk_size records."""
+    with open(filename, 'r') as file:
+        reader = csv.DictReader(file)
+        chunk = []
+        for row in reader:
+            chunk.append(parse_student_row(row))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
 # Predicate functions
 def is_passing(student: Dict[str, Any]) -> bool:
     """All scores are greater than or equal to 5."""
@@ -170,35 +221,1414 @@ def not_for_struggling_math_exists_subject_above_6(students: List[Dict[str, Any]
     return not for_struggling_math_exists_subject_above_6(students)
 
 
-def evaluate_all_statements(students: List[Dict[str, Any]]):
-    """Evaluate all predicate logic statements on the student dataset."""
-    # Define all statements with their names and functions
-    statements = [
-        ("Universal 1: All students passed all subjects", all_students_passed),
-        ("Universal 2: All students have a math score higher than 3", all_students_math_above_3),
-        ("Existential 1: There exists a student who scored above 9 in math", exists_student_high_math),
-        ("Existential 2: There exists a student who improved in CS over Math", exists_student_improved_cs),
-        ("Combined 1: For every student, there exists a subject in which they scored above 6", 
-         for_every_student_exists_subject_above_6),
-        ("Combined 2: For every student scoring below 6 in Math, there exists a subject where they scored above 6", 
-         for_struggling_math_exists_subject_above_6),
-        ("Negation 1: Not all students passed all subjects", not_all_students_passed),
-        ("Negation 2: Not all students have a math score higher than 3", not_all_students_math_above_3),
-        ("Negation 3: There does not exist a student who scored above 9 in math", not_exists_student_high_math),
-        ("Negation 4: There does not exist a student who improved in CS over Math", not_exists_student_improved_cs),
-        ("Negation 5: It is not the case that for every student, there exists a subject in which they scored above 6", 
-         not_for_every_student_exists_subject_above_6),
-        ("Negation 6: It is not the case that for every student scoring below 6 in Math, there exists a subject where they scored above 6", 
-         not_for_struggling_math_exists_subject_above_6)
-    ]
+# All statements with their names and functions
+STATEMENTS = [
+    ("Universal 1: All students passed all subjects", all_students_passed),
+    ("Universal 2: All students have a math score higher than 3", all_students_math_above_3),
+    ("Existential 1: There exists a student who scored above 9 in math", exists_student_high_math),
+    ("Existential 2: There exists a student who improved in CS over Math", exists_student_improved_cs),
+    ("Combined 1: For every student, there exists a subject in which they scored above 6", 
+     for_every_student_exists_subject_above_6),
+    ("Combined 2: For every student scoring below 6 in Math, there exists a subject where they scored above 6", 
+     for_struggling_math_exists_subject_above_6),
+    ("Negation 1: Not all students passed all subjects", not_all_students_passed),
+    ("Negation 2: Not all students have a math score higher than 3", not_all_students_math_above_3),
+    ("Negation 3: There does not exist a student who scored above 9 in math", not_exists_student_high_math),
+    ("Negation 4: There does not exist a student who improved in CS over Math", not_exists_student_improved_cs),
+    ("Negation 5: It is not the case that for every student, there exists a subject in which they scored above 6", 
+     not_for_every_student_exists_subject_above_6),
+    ("Negation 6: It is not the case that for every student scoring below 6 in Math, there exists a subject where they scored above 6", 
+     not_for_struggling_math_exists_subject_above_6)
+]
+
+
+# Extra row predicates used by the quantified statements below
+def has_math_above_3(student: Dict[str, Any]) -> bool:
+    """Math score is greater than 3."""
+    return student['Math'] > 3
+
+
+def has_subject_above_6(student: Dict[str, Any]) -> bool:
+    """At least one score is greater than 6."""
+    return student['Math'] > 6 or student['CS'] > 6 or student['Eng'] > 6
+
+
+def has_cs_or_eng_above_6(student: Dict[str, Any]) -> bool:
+    """CS or English score is greater than 6."""
+    return student['CS'] > 6 or student['Eng'] > 6
+
+
+def is_below_6_in_math(student: Dict[str, Any]) -> bool:
+    """Math score is less than 6."""
+    return student['Math'] < 6
+
+
+# Each positive statement as (quantifier, predicate, domain filter): "forall" holds when
+# every student in the domain satisfies the predicate, "exists" when at least one does.
+STATEMENT_SPECS = {
+    all_students_passed: ("forall", is_passing, None),
+    all_students_math_above_3: ("forall", has_math_above_3, None),
+    exists_student_high_math: ("exists", is_high_math, None),
+    exists_student_improved_cs: ("exists", improved_in_cs, None),
+    for_every_student_exists_subject_above_6: ("forall", has_subject_above_6, None),
+    for_struggling_math_exists_subject_above_6: ("forall", has_cs_or_eng_above_6, is_below_6_in_math),
+}
+
+# Each negation and the positive statement it negates
+NEGATIONS = {
+    not_all_students_passed: all_students_passed,
+    not_all_students_math_above_3: all_students_math_above_3,
+    not_exists_student_high_math: exists_student_high_math,
+    not_exists_student_improved_cs: exists_student_improved_cs,
+    not_for_every_student_exists_subject_above_6: for_every_student_exists_subject_above_6,
+    not_for_struggling_math_exists_subject_above_6: for_struggling_math_exists_subject_above_6,
+}
+
+
+class QuantifierEvaluator:
+    """Evaluate many quantified statements together in a single pass over the students.
+
+    Students are fed in with feed(). Each predicate is computed at most once
+    per student and shared by every statement that needs it. A statement
+    stops being checked as soon as its value is decided (a counterexample
+    for "forall", a witness for "exists"), and negations are derived from
+    their positive statement instead of being evaluated again.
+    """
+
+    def __init__(self, statements: Iterable[Any], specs: Dict[Any, Any] = None):
+        self.statements = list(statements)
+        # Extra (quantifier, predicate, domain) specs, e.g. for compiled queries
+        self.specs = STATEMENT_SPECS if specs is None else {**STATEMENT_SPECS, **specs}
+        self.results: Dict[Any, bool] = {}
+        # Row number and record of the student that decided each statement
+        self.witnesses: Dict[Any, Any] = {}
+        self.rows_seen = 0
+        
+        # Only positive statements are evaluated
+        self.pending = []
+        for statement in self.statements:
+            positive = NEGATIONS.get(statement, statement)
+            if positive not in self.pending:
+                self.pending.append(positive)
+        self._update_predicates()
+
+    def _update_predicates(self) -> None:
+        """Collect the distinct predicates still needed by the pending statements."""
+        predicates = []
+        for statement in self.pending:
+            _, predicate, domain = self.specs[statement]
+            for func in (domain, predicate):
+                if func is not None and func not in predicates:
+                    predicates.append(func)
+        self.predicates = predicates
+
+    def discard(self, statements: Iterable[Any]) -> None:
+        """Stop evaluating statements that were decided elsewhere (e.g. in another partition)."""
+        statements = set(statements)
+        if any(statement in statements for statement in self.pending):
+            self.pending = [statement for statement in self.pending if statement not in statements]
+            self._update_predicates()
+
+    @property
+    def done(self) -> bool:
+        """True once every statement is decided."""
+        return not self.pending
+
+    def feed(self, students: Iterable[Dict[str, Any]]) -> bool:
+        """Process more students and return True once every statement is decided."""
+        for student in students:
+            if not self.pending:
+                break
+            values = {predicate: predicate(student) for predicate in self.predicates}
+            
+            decided = []
+            for statement in self.pending:
+                quantifier, predicate, domain = self.specs[statement]
+                if domain is not None and not values[domain]:
+                    continue
+                # A false "forall" or a true "exists" is final
+                if values[predicate] == (quantifier == "exists"):
+                    self.results[statement] = values[predicate]
+                    self.witnesses[statement] = (self.rows_seen, student)
+                    decided.append(statement)
+            
+            self.rows_seen += 1
+            if decided:
+                self.pending = [statement for statement in self.pending if statement not in decided]
+                self._update_predicates()
+        return self.done
+
+    def finish(self) -> Dict[Any, bool]:
+        """Results of all requested statements once there are no more students."""
+        # Undecided "forall" statements hold and undecided "exists" statements do not
+        results = dict(self.results)
+        for statement in self.pending:
+            results[statement] = self.specs[statement][0] == "forall"
+        
+        return {statement: (not results[NEGATIONS[statement]]) if statement in NEGATIONS else results[statement]
+                for statement in self.statements}
+
+
+class IncrementalStatements:
+    """Keep the result of every statement up to date while students are added, changed or removed.
+
+    For each positive statement only a counter is stored: the number of
+    counterexamples for "forall" statements and the number of witnesses
+    for "exists" statements. Each change adjusts the counters of the
+    affected student, so updates cost O(1) per statement and results are
+    read directly from the counters.
+    """
+
+    def __init__(self, students: Iterable[Dict[str, Any]] = ()):
+        self.students: Dict[str, Dict[str, Any]] = {}
+        self.counts = {statement: 0 for statement in STATEMENT_SPECS}
+        for student in students:
+            self.append(student)
+
+    def _count(self, student: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a student's counterexamples and witnesses."""
+        for statement, (quantifier, predicate, domain) in STATEMENT_SPECS.items():
+            if domain is not None and not domain(student):
+                continue
+            if predicate(student) == (quantifier == "exists"):
+                self.counts[statement] += sign
+
+    def append(self, student: Dict[str, Any]) -> None:
+        """Add a new student record (scores may still be strings, as read from CSV)."""
+        student = parse_student_row(dict(student))
+        if student['StudentID'] in self.students:
+            raise ValueError(f"Student {student['StudentID']} already exists")
+        self.students[student['StudentID']] = student
+        self._count(student, 1)
+
+    def update(self, student_id: str, changes: Dict[str, Any]) -> None:
+        """Change some fields of an existing student."""
+        old = self.students[student_id]
+        new = parse_student_row({**old, **changes})
+        if new['StudentID'] != student_id:
+            raise ValueError("StudentID cannot be changed, delete and append instead")
+        self._count(old, -1)
+        self.students[student_id] = new
+        self._count(new, 1)
+
+    def delete(self, student_id: str) -> None:
+        """Remove a student."""
+        self._count(self.students.pop(student_id), -1)
+
+    def __len__(self) -> int:
+        return len(self.students)
+
+    def result(self, statement: Any) -> bool:
+        """Current value of one statement (any function from STATEMENTS)."""
+        if statement in NEGATIONS:
+            return not self.result(NEGATIONS[statement])
+        if STATEMENT_SPECS[statement][0] == "forall":
+            return self.counts[statement] == 0
+        return self.counts[statement] > 0
+
+    def results(self) -> Dict[Any, bool]:
+        """Current value of every statement in STATEMENTS."""
+        return {func: self.result(func) for _, func in STATEMENTS}
+
+
+def evaluate_csv_streaming(filename: str, statements: Iterable[Any] = None,
+                           chunk_size: int = 10000) -> Dict[Any, bool]:
+    """Evaluate statements on a CSV file while reading it chunk by chunk.
+
+    Reading stops as soon as every statement is decided, so an existential
+    that succeeds early never causes the rest of the file to be read.
+    """
+    if statements is None:
+        statements = [func for _, func in STATEMENTS]
+    evaluator = QuantifierEvaluator(statements)
+    with closing(iter_student_chunks(filename, chunk_size)) as chunks:
+        for chunk in chunks:
+            if evaluator.feed(chunk):
+                break
+    return evaluator.finish()
+
+
+def evaluate_partition(filename: str, statement_names: List[str], chunk_size: int = 10000,
+                       decided_names: Any = None) -> Dict[str, Any]:
+    """Evaluate positive statements (given by function name) on one CSV partition.
+
+    decided_names, if given, is a dict shared between processes (a
+    multiprocessing Manager dict) whose keys are the names of statements
+    already decided elsewhere. It is checked between chunks: those
+    statements are dropped, and reading stops once none are left. Names
+    decided here are added to it for the other partitions.
+
+    Returns, for every statement decided inside the partition, its value
+    and the row number (0-based, excluding the header) and record of the
+    deciding student.
+    """
+    statements = [globals()[name] for name in statement_names]
+    evaluator = QuantifierEvaluator(statements)
+    with closing(iter_student_chunks(filename, chunk_size)) as chunks:
+        for chunk in chunks:
+            if decided_names is not None:
+                evaluator.discard(globals()[name] for name in decided_names.keys())
+                if evaluator.done:
+                    break
+            if evaluator.feed(chunk):
+                break
+            if decided_names is not None:
+                decided_names.update({statement.__name__: True for statement in evaluator.results})
+    return {statement.__name__: (value, *evaluator.witnesses[statement])
+            for statement, value in evaluator.results.items()}
+
+
+def evaluate_partitions(filenames: List[str], statements: Iterable[Any] = None, workers: int = None,
+                        chunk_size: int = 10000) -> Tuple[Dict[Any, bool], Dict[Any, Dict[str, Any]]]:
+    """Evaluate statements over many CSV partitions in a process pool.
+
+    Partitions are merged with AND for "forall" and OR for "exists"; every
+    statement is about single students, so a student's nested conditions
+    are fully decided inside its own partition. At most `workers`
+    partitions are in flight, each new one only evaluates the statements
+    that are still open, and decided statements are shared with running
+    partitions, which drop them between chunks. Once every statement is
+    decided, queued partitions are cancelled and running ones stop at
+    their next chunk; the shared dict is only closed after they have.
+
+    Returns (results, witnesses). witnesses maps each decided statement to
+    the partition, row and record of the witness or counterexample.
+    """
+    if statements is None:
+        statements = [func for _, func in STATEMENTS]
+    statements = list(statements)
+    positives = list(dict.fromkeys(NEGATIONS.get(statement, statement) for statement in statements))
+    decided: Dict[Any, bool] = {}
+    found: Dict[Any, Dict[str, Any]] = {}
+    
+    workers = workers or os.cpu_count() or 1
+    queue = list(filenames)
+    running = {}
+    with Manager() as manager:
+        # Names of decided statements, visible to every partition while it runs
+        decided_names = manager.dict()
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            while queue or running:
+                # Keep the pool busy, asking each partition only about open statements
+                open_names = [statement.__name__ for statement in positives if statement not in decided]
+                if not open_names:
+                    break
+                while queue and len(running) < workers:
+                    filename = queue.pop(0)
+                    future = executor.submit(evaluate_partition, filename, open_names, chunk_size, decided_names)
+                    running[future] = filename
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    filename = running.pop(future)
+                    for name, (value, row, student) in future.result().items():
+                        statement = globals()[name]
+                        if statement not in decided:
+                            decided[statement] = value
+                            found[statement] = {'partition': filename, 'row': row, 'student': student}
+                decided_names.update({statement.__name__: True for statement in decided})
+        finally:
+            # Running partitions see every statement decided and stop at their next chunk.
+            # Wait for them while the manager is still up, so none of them loses its
+            # connection to decided_names midway.
+            decided_names.update({statement.__name__: True for statement in positives})
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    # Undecided "forall" statements hold and undecided "exists" statements do not
+    for statement in positives:
+        decided.setdefault(statement, STATEMENT_SPECS[statement][0] == "forall")
+    
+    results = {}
+    witnesses = {}
+    for statement in statements:
+        positive = NEGATIONS.get(statement, statement)
+        results[statement] = not decided[positive] if statement in NEGATIONS else decided[positive]
+        if positive in found:
+            witnesses[statement] = found[positive]
+    return results, witnesses
+
+
+def evaluate_statements_fused(students: Iterable[Dict[str, Any]], statements: Iterable[Any] = None) -> Dict[Any, bool]:
+    """Evaluate statements (all of STATEMENTS by default) in a single pass over the students."""
+    if statements is None:
+        statements = [func for _, func in STATEMENTS]
+    evaluator = QuantifierEvaluator(statements)
+    evaluator.feed(students)
+    return evaluator.finish()
+
+
+# Columnar storage
+class EncodedColumn:
+    """String column stored as a list of distinct values plus one integer code per row."""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.codes = array('I')
+        self._index: Dict[str, int] = {}
+        for value in values:
+            self.append(value)
+
+    def append(self, value: str) -> None:
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._index[value] = code
+        self.codes.append(code)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> str:
+        return self.values[self.codes[i]]
+
+    def __iter__(self) -> Iterator[str]:
+        values = self.values
+        return (values[code] for code in self.codes)
+
+
+class StudentColumns:
+    """Student dataset stored column by column instead of one dict per student.
+
+    Scores are kept in compact float arrays, names and birth dates are
+    dictionary-encoded because they repeat a lot, and IDs are a plain list.
+    """
+
+    def __init__(self, student_ids: Sequence[str], student_names: Sequence[str], birth_dates: Sequence[str],
+                 math: Sequence[float], cs: Sequence[float], eng: Sequence[float]):
+        self.student_ids = student_ids
+        self.student_names = student_names
+        self.birth_dates = birth_dates
+        self.math = math
+        self.cs = cs
+        self.eng = eng
+
+    @classmethod
+    def from_records(cls, students: Iterable[Dict[str, Any]]) -> "StudentColumns":
+        """Build columns from records in the format returned by load_student_data."""
+        columns = cls([], EncodedColumn(), EncodedColumn(), array('d'), array('d'), array('d'))
+        for student in students:
+            columns.append(student)
+        return columns
+
+    def append(self, student: Dict[str, Any]) -> None:
+        self.student_ids.append(student['StudentID'])
+        self.student_names.append(student['StudentName'])
+        self.birth_dates.append(student['DayOfBirth'])
+        self.math.append(float(student['Math']))
+        self.cs.append(float(student['CS']))
+        self.eng.append(float(student['Eng']))
+
+    def __len__(self) -> int:
+        return len(self.math)
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """Student i in the format returned by load_student_data."""
+        return {
+            'StudentID': self.student_ids[i],
+            'StudentName': self.student_names[i],
+            'DayOfBirth': self.birth_dates[i],
+            'Math': self.math[i],
+            'CS': self.cs[i],
+            'Eng': self.eng[i],
+        }
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+
+def load_student_columns(filename: str, cache: bool = False) -> StudentColumns:
+    """Load student data from a CSV file into columns.
+
+    With cache=True the columns are memory-mapped from a binary cache next
+    to the CSV (filename + '.cols'), which is rebuilt whenever the CSV
+    changes or is invalid. If the cache cannot be written, the parsed
+    columns are returned uncached. Cached columns are read-only views, so
+    they cannot be appended to.
+    """
+    if cache:
+        cache_filename = filename + '.cols'
+        source = source_signature(filename)
+        columns = open_column_cache(cache_filename, source)
+        if columns is None:
+            columns = load_student_columns(filename)
+            try:
+                write_column_cache(columns, cache_filename, source)
+            except OSError:
+                # e.g. a read-only directory: use the parsed columns without caching them
+                pass
+        return columns
+    
+    columns = StudentColumns([], EncodedColumn(), EncodedColumn(), array('d'), array('d'), array('d'))
+    with open(filename, 'r') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        id_col, name_col, birth_col, math_col, cs_col, eng_col = (
+            header.index(name) for name in ["StudentID", "StudentName", "DayOfBirth", "Math", "CS", "Eng"])
+        
+        # Append straight to the columns, without building a dict per row
+        for row in reader:
+            columns.student_ids.append(row[id_col])
+            columns.student_names.append(row[name_col])
+            columns.birth_dates.append(row[birth_col])
+            columns.math.append(float(row[math_col]))
+            columns.cs.append(float(row[cs_col]))
+            columns.eng.append(float(row[eng_col]))
+    return columns
+
+
+def source_signature(filename: str) -> Dict[str, Any]:
+    """Path, size and modification time of a file, used to detect stale derived files."""
+    stat = os.stat(filename)
+    return {'path': os.path.abspath(filename), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+# Binary column cache
+#
+# Layout: one JSON header line padded to a multiple of 8 bytes, then each
+# column as a section starting at an 8-byte boundary. Score columns are raw
+# float64 arrays; string columns are count+1 uint64 offsets followed by a
+# UTF-8 heap. The header records the offset of every section.
+CACHE_MAGIC = "student-columns-1"
+SCORE_COLUMNS = {'Math': 'math', 'CS': 'cs', 'Eng': 'eng'}
+STRING_COLUMNS = {'StudentID': 'student_ids', 'StudentName': 'student_names', 'DayOfBirth': 'birth_dates'}
+
+
+class StringHeapColumn:
+    """Read-only string column backed by an offsets array and a UTF-8 heap."""
+
+    def __init__(self, offsets: memoryview, heap: memoryview):
+        self.offsets = offsets
+        self.heap = heap
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return str(self.heap[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        heap = bytes(self.heap)
+        offsets = self.offsets
+        for i in range(len(self)):
+            yield heap[offsets[i]:offsets[i + 1]].decode('utf-8')
+
+
+def _padding(size: int) -> bytes:
+    return b'\0' * (-size % 8)
+
+
+class ColumnCacheWriter:
+    """Write a column cache chunk by chunk with flat memory use.
+
+    Every section is spilled to its own temporary file while chunks are
+    appended; close() writes the header and concatenates the sections.
+    """
+
+    def __init__(self, filename: str, source: Dict[str, Any] = None):
+        self.filename = filename
+        self.source = source
+        self.count = 0
+        self.sections = {}
+        for name in SCORE_COLUMNS:
+            self.sections[name] = tempfile.TemporaryFile()
+        self.heap_sizes = {}
+        for name in STRING_COLUMNS:
+            self.sections[name + '.offsets'] = tempfile.TemporaryFile()
+            self.sections[name + '.heap'] = tempfile.TemporaryFile()
+            self.sections[name + '.offsets'].write(array('Q', [0]).tobytes())
+            self.heap_sizes[name] = 0
+
+    def append(self, columns: StudentColumns) -> None:
+        for name, attribute in SCORE_COLUMNS.items():
+            self.sections[name].write(array('d', getattr(columns, attribute)).tobytes())
+        for name, attribute in STRING_COLUMNS.items():
+            encoded = [value.encode('utf-8') for value in getattr(columns, attribute)]
+            offsets = array('Q')
+            size = self.heap_sizes[name]
+            for value in encoded:
+                size += len(value)
+                offsets.append(size)
+            self.heap_sizes[name] = size
+            self.sections[name + '.offsets'].write(offsets.tobytes())
+            self.sections[name + '.heap'].write(b''.join(encoded))
+        self.count += len(columns)
+
+    def close(self) -> None:
+        # Section offsets are relative to the end of the header
+        layout = {}
+        position = 0
+        for name, section in self.sections.items():
+            size = section.tell()
+            layout[name] = [position, size]
+            position += size + len(_padding(size))
+        header = json.dumps({'magic': CACHE_MAGIC, 'source': self.source, 'count': self.count, 'layout': layout})
+        header = header.encode('utf-8')
+        header += b' ' * (-(len(header) + 1) % 8) + b'\n'
+
+        # Write to a temporary file first so readers never map a half-written cache
+        temporary = f"{self.filename}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(header)
+            for section in self.sections.values():
+                size = section.tell()
+                section.seek(0)
+                shutil.copyfileobj(section, file)
+                file.write(_padding(size))
+                section.close()
+        os.replace(temporary, self.filename)
+
+
+def write_column_cache(columns: StudentColumns, filename: str, source: Dict[str, Any] = None) -> None:
+    """Write columns to a binary cache file that open_column_cache() can memory-map."""
+    writer = ColumnCacheWriter(filename, source)
+    writer.append(columns)
+    writer.close()
+
+
+def open_column_cache(filename: str, source: Dict[str, Any] = None) -> StudentColumns:
+    """Memory-map a column cache, or return None if it is missing, invalid or stale.
+
+    Score columns are zero-copy float64 views of the file, and string
+    columns decode their values on access.
+    """
+    try:
+        with open(filename, 'rb') as file:
+            header = json.loads(file.readline())
+            start = file.tell()
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(header, dict) or header.get('magic') != CACHE_MAGIC or not isinstance(header.get('layout'), dict):
+        mapped.close()
+        return None
+    if source is not None and header.get('source') != source:
+        mapped.close()
+        return None
+    
+    view = memoryview(mapped)
+    count = header.get('count')
+    
+    def section(name: str, fmt: str, length: int = None) -> memoryview:
+        offset, size = header['layout'][name]
+        if offset < 0 or size < 0 or start + offset + size > len(view):
+            raise ValueError(f"Section {name} is outside the file")
+        column = view[start + offset:start + offset + size].cast(fmt)
+        if length is not None and len(column) != length:
+            raise ValueError(f"Section {name} has the wrong length")
+        return column
+    
+    # Any inconsistency in the layout means the cache is invalid, not that loading failed
+    try:
+        if not isinstance(count, int) or count < 0:
+            raise ValueError("Invalid count")
+        numbers = {attribute: section(name, 'd', count) for name, attribute in SCORE_COLUMNS.items()}
+        strings = {attribute: StringHeapColumn(section(name + '.offsets', 'Q', count + 1), section(name + '.heap', 'B'))
+                   for name, attribute in STRING_COLUMNS.items()}
+    except (KeyError, TypeError, ValueError):
+        numbers = None
+    if numbers is None:
+        # Outside the except block, so the traceback no longer pins views of the map
+        view.release()
+        mapped.close()
+        return None
+    return StudentColumns(strings['student_ids'], strings['student_names'], strings['birth_dates'],
+                          numbers['math'], numbers['cs'], numbers['eng'])
+
+
+# Fast, seeded generation. Scores are drawn as whole tenths (73 means 7.3), which is
+# what the rounding in generate_student_dataset produces, with the same ranges.
+FULL_NAMES = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+SCORE_TEXT = [str(tenths / 10) for tenths in range(101)]
+SCORE_VALUE = [tenths / 10 for tenths in range(101)]
+
+
+def _every(start: int, count: int, step: int) -> slice:
+    """Positions within a chunk of the students whose 1-based number is a multiple of step."""
+    return slice(-(start + 1) % step, count, step)
+
+
+def generate_student_chunk(start: int, count: int, seed: Any, reference_date: date) -> Tuple[List[Any], ...]:
+    """Generate students start+1 .. start+count as columns of IDs, names, birth dates and score tenths.
+
+    The random generator is seeded from (seed, start), so a chunk is the
+    same no matter which process generates it or in what order.
+    """
+    rng = random.Random(f"{seed}-{start}")
+    
+    student_ids = list(map("S{:03d}".format, range(start + 1, start + count + 1)))
+    names = rng.choices(FULL_NAMES, k=count)
+    birth_dates = [(reference_date - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+                   for days_ago in range(18*365, 25*365 + 1)]
+    births = rng.choices(birth_dates, k=count)
+    math = rng.choices(range(30, 101), k=count)
+    cs = rng.choices(range(20, 101), k=count)
+    eng = rng.choices(range(30, 101), k=count)
+    
+    # Every 5th student has high math
+    high = _every(start, count, 5)
+    math[high] = rng.choices(range(90, 101), k=len(math[high]))
+    # Every 7th student is struggling
+    struggling = _every(start, count, 7)
+    math[struggling] = rng.choices(range(20, 60), k=len(math[struggling]))
+    cs[struggling] = rng.choices(range(20, 60), k=len(cs[struggling]))
+    # Every 3rd student improved in CS
+    improved = _every(start, count, 3)
+    gains = rng.choices(range(5, 21), k=len(cs[improved]))
+    cs[improved] = [min(score + gain, 100) for score, gain in zip(math[improved], gains)]
+    
+    return student_ids, names, births, math, cs, eng
+
+
+def _generate_chunk_csv(start: int, count: int, seed: Any, reference_date: date) -> str:
+    """One chunk as CSV text, with the same line endings as csv.writer."""
+    student_ids, names, births, math, cs, eng = generate_student_chunk(start, count, seed, reference_date)
+    text = SCORE_TEXT.__getitem__
+    rows = map(",".join, zip(student_ids, names, births, map(text, math), map(text, cs), map(text, eng)))
+    return "\r\n".join(rows) + "\r\n"
+
+
+def _generate_chunk_columns(start: int, count: int, seed: Any, reference_date: date) -> StudentColumns:
+    """One chunk as StudentColumns."""
+    student_ids, names, births, math, cs, eng = generate_student_chunk(start, count, seed, reference_date)
+    value = SCORE_VALUE.__getitem__
+    return StudentColumns(student_ids, names, births, list(map(value, math)), list(map(value, cs)),
+                          list(map(value, eng)))
+
+
+def generate_student_dataset_fast(num_records: int, filename: str = "students.csv", seed: Any = None,
+                                  chunk_size: int = 100000, output: str = "csv", workers: int = None,
+                                  reference_date: date = None) -> str:
+    """Generate a large student dataset quickly and reproducibly.
+
+    Students are generated in chunks with batched random draws, following
+    the same rules as generate_student_dataset, and streamed to `filename`
+    either as CSV (output="csv") or as a binary column cache
+    (output="columns", readable with open_column_cache). With workers > 1
+    chunks are generated in a process pool. The same seed, chunk_size and
+    reference_date (default: today) always give the same file, whatever
+    the number of workers.
+    """
+    if output not in ("csv", "columns"):
+        raise ValueError(f"Unknown output format: {output}")
+    if seed is None:
+        seed = random.randrange(2**63)
+    reference_date = reference_date or date.today()
+    generate = _generate_chunk_csv if output == "csv" else _generate_chunk_columns
+    starts = list(range(0, num_records, chunk_size))
+    arguments = [(start, min(chunk_size, num_records - start), seed, reference_date) for start in starts]
+    
+    if output == "csv":
+        target = open(filename, 'w', newline='')
+        target.write(",".join(HEADERS) + "\r\n")
+        write = target.write
+    else:
+        target = ColumnCacheWriter(filename)
+        write = target.append
+    
+    try:
+        if workers is not None and workers > 1:
+            # Keep a bounded window of chunks in flight and write them in order
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = []
+                for args in arguments:
+                    pending.append(executor.submit(generate, *args))
+                    if len(pending) >= 2 * workers:
+                        write(pending.pop(0).result())
+                for future in pending:
+                    write(future.result())
+        else:
+            for args in arguments:
+                write(generate(*args))
+    finally:
+        target.close()
+    
+    print(f"Generated {num_records} student records in {filename} (seed={seed})")
+    return filename
+
+
+# Vectorized predicates: one result per student, computed column-wise with map()
+def is_passing_vectorized(columns: StudentColumns) -> List[bool]:
+    """All scores are greater than or equal to 5."""
+    math_ok = map(ge, columns.math, repeat(5))
+    cs_ok = map(ge, columns.cs, repeat(5))
+    eng_ok = map(ge, columns.eng, repeat(5))
+    return list(map(and_, map(and_, math_ok, cs_ok), eng_ok))
+
+
+def is_high_math_vectorized(columns: StudentColumns) -> List[bool]:
+    """Math score is greater than or equal to 9."""
+    return list(map(ge, columns.math, repeat(9)))
+
+
+def is_struggling_vectorized(columns: StudentColumns) -> List[bool]:
+    """Math and CS score is less than 6."""
+    return list(map(and_, map(lt, columns.math, repeat(6)), map(lt, columns.cs, repeat(6))))
+
+
+def improved_in_cs_vectorized(columns: StudentColumns) -> List[bool]:
+    """CS score is greater than math score."""
+    return list(map(gt, columns.cs, columns.math))
+
+
+# Vectorized quantifiers: whole-column min/max and short-circuiting any/all over map()
+def all_students_passed_vectorized(columns: StudentColumns) -> bool:
+    """All students passed all subjects."""
+    return len(columns) == 0 or (min(columns.math) >= 5 and min(columns.cs) >= 5 and min(columns.eng) >= 5)
+
+
+def all_students_math_above_3_vectorized(columns: StudentColumns) -> bool:
+    """All students have a math score higher than 3."""
+    return len(columns) == 0 or min(columns.math) > 3
+
+
+def exists_student_high_math_vectorized(columns: StudentColumns) -> bool:
+    """There exists a student who scored above 9 in math."""
+    return len(columns) > 0 and max(columns.math) >= 9
+
+
+def exists_student_improved_cs_vectorized(columns: StudentColumns) -> bool:
+    """There exists a student who improved in CS over Math."""
+    return any(map(gt, columns.cs, columns.math))
+
+
+def for_every_student_exists_subject_above_6_vectorized(columns: StudentColumns) -> bool:
+    """For every student, there exists a subject in which they scored above 6."""
+    return all(map(gt, map(max, columns.math, columns.cs, columns.eng), repeat(6)))
+
+
+def for_struggling_math_exists_subject_above_6_vectorized(columns: StudentColumns) -> bool:
+    """For every student scoring below 6 in Math, there exists a subject where they scored above 6."""
+    below_6 = list(map(lt, columns.math, repeat(6)))
+    best_other = map(max, compress(columns.cs, below_6), compress(columns.eng, below_6))
+    return all(map(gt, best_other, repeat(6)))
+
+
+def not_all_students_passed_vectorized(columns: StudentColumns) -> bool:
+    """Not all students passed all subjects."""
+    return not all_students_passed_vectorized(columns)
+
+
+def not_all_students_math_above_3_vectorized(columns: StudentColumns) -> bool:
+    """Not all students have a math score higher than 3."""
+    return not all_students_math_above_3_vectorized(columns)
+
+
+def not_exists_student_high_math_vectorized(columns: StudentColumns) -> bool:
+    """There does not exist a student who scored above 9 in math."""
+    return not exists_student_high_math_vectorized(columns)
+
+
+def not_exists_student_improved_cs_vectorized(columns: StudentColumns) -> bool:
+    """There does not exist a student who improved in CS over Math."""
+    return not exists_student_improved_cs_vectorized(columns)
+
+
+def not_for_every_student_exists_subject_above_6_vectorized(columns: StudentColumns) -> bool:
+    """It is not the case that for every student, there exists a subject in which they scored above 6."""
+    return not for_every_student_exists_subject_above_6_vectorized(columns)
+
+
+def not_for_struggling_math_exists_subject_above_6_vectorized(columns: StudentColumns) -> bool:
+    """It is not the case that for every student scoring below 6 in Math, there exists a subject where they scored above 6."""
+    return not for_struggling_math_exists_subject_above_6_vectorized(columns)
+
+
+# Vectorized version of every statement, used when evaluating on columns
+VECTORIZED = {
+    all_students_passed: all_students_passed_vectorized,
+    all_students_math_above_3: all_students_math_above_3_vectorized,
+    exists_student_high_math: exists_student_high_math_vectorized,
+    exists_student_improved_cs: exists_student_improved_cs_vectorized,
+    for_every_student_exists_subject_above_6: for_every_student_exists_subject_above_6_vectorized,
+    for_struggling_math_exists_subject_above_6: for_struggling_math_exists_subject_above_6_vectorized,
+    not_all_students_passed: not_all_students_passed_vectorized,
+    not_all_students_math_above_3: not_all_students_math_above_3_vectorized,
+    not_exists_student_high_math: not_exists_student_high_math_vectorized,
+    not_exists_student_improved_cs: not_exists_student_improved_cs_vectorized,
+    not_for_every_student_exists_subject_above_6: not_for_every_student_exists_subject_above_6_vectorized,
+    not_for_struggling_math_exists_subject_above_6: not_for_struggling_math_exists_subject_above_6_vectorized,
+}
+
+
+# Column statistics and sorted indexes
+class ColumnIndex:
+    """Count, min, max and sorted order of one score column.
+
+    `values` holds the scores in ascending order and `rows` the matching
+    row numbers, so every threshold filter is a slice found by bisection.
+    """
+
+    def __init__(self, values: array, rows: array):
+        self.values = values
+        self.rows = rows
+
+    @classmethod
+    def build(cls, column: Sequence[float]) -> "ColumnIndex":
+        order = sorted(range(len(column)), key=column.__getitem__)
+        return cls(array('d', [column[i] for i in order]), array('I', order))
+
+    @property
+    def count(self) -> int:
+        return len(self.values)
+
+    @property
+    def min(self) -> float:
+        return self.values[0] if self.values else None
+
+    @property
+    def max(self) -> float:
+        return self.values[-1] if self.values else None
+
+    def rows_less_than(self, value: float) -> array:
+        return self.rows[:bisect_left(self.values, value)]
+
+    def rows_at_most(self, value: float) -> array:
+        return self.rows[:bisect_right(self.values, value)]
+
+    def rows_greater_than(self, value: float) -> array:
+        return self.rows[bisect_right(self.values, value):]
+
+    def rows_at_least(self, value: float) -> array:
+        return self.rows[bisect_left(self.values, value):]
+
+
+class StudentIndex:
+    """Statistics and sorted indexes for every score column of a dataset."""
+
+    MAGIC = "student-index-1"
+
+    def __init__(self, columns: Dict[str, ColumnIndex]):
+        self.columns = columns
+
+    @classmethod
+    def build(cls, columns: StudentColumns) -> "StudentIndex":
+        return cls({name: ColumnIndex.build(getattr(columns, attribute))
+                    for name, attribute in SCORE_COLUMNS.items()})
+
+    def __getitem__(self, name: str) -> ColumnIndex:
+        return self.columns[name]
+
+    def save(self, filename: str, source: Dict[str, int] = None) -> None:
+        """Write a JSON header line followed by the raw sorted values and row numbers."""
+        header = {
+            'magic': self.MAGIC,
+            'source': source,
+            'count': self['Math'].count,
+            'stats': {name: {'min': index.min, 'max': index.max} for name, index in self.columns.items()},
+        }
+        # Write to a temporary file first so readers never see a half-written index
+        temporary = f"{filename}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(json.dumps(header).encode('utf-8') + b'\n')
+            for name in SCORE_COLUMNS:
+                file.write(self[name].values.tobytes())
+                file.write(self[name].rows.tobytes())
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename: str, source: Dict[str, int] = None) -> "StudentIndex":
+        """Read an index written by save(), or return None if it is missing, invalid or stale."""
+        try:
+            with open(filename, 'rb') as file:
+                header = json.loads(file.readline())
+                data = file.read()
+        except (OSError, ValueError):
+            return None
+        if not isinstance(header, dict) or header.get('magic') != cls.MAGIC:
+            return None
+        if source is not None and header.get('source') != source:
+            return None
+        count = header.get('count')
+        if not isinstance(count, int) or count < 0:
+            return None
+        
+        values_size = count * array('d').itemsize
+        rows_size = count * array('I').itemsize
+        if len(data) != len(SCORE_COLUMNS) * (values_size + rows_size):
+            return None
+        
+        columns = {}
+        offset = 0
+        for name in SCORE_COLUMNS:
+            values = array('d')
+            values.frombytes(data[offset:offset + values_size])
+            offset += values_size
+            rows = array('I')
+            rows.frombytes(data[offset:offset + rows_size])
+            offset += rows_size
+            columns[name] = ColumnIndex(values, rows)
+        return cls(columns)
+
+
+def load_student_index(filename: str, columns: StudentColumns = None) -> StudentIndex:
+    """Load the index stored next to a CSV file (filename + '.idx').
+
+    The index is rebuilt and saved again if it is missing or the CSV file
+    has changed since it was written. If it cannot be saved, the rebuilt
+    index is still returned.
+    """
+    index_filename = filename + '.idx'
+    source = source_signature(filename)
+    index = StudentIndex.load(index_filename, source)
+    if index is None:
+        if columns is None:
+            columns = load_student_columns(filename)
+        index = StudentIndex.build(columns)
+        try:
+            index.save(index_filename, source)
+        except OSError:
+            # e.g. a read-only directory: use the rebuilt index without saving it
+            pass
+    return index
+
+
+def evaluate_statements_indexed(columns: StudentColumns, index: StudentIndex) -> Dict[Any, bool]:
+    """Evaluate every statement using the column statistics and sorted indexes.
+
+    Single-column thresholds are answered from min/max alone, and the
+    nested statements only look at the rows inside the smallest index
+    slice that can contain a counterexample.
+    """
+    math, cs, eng = index['Math'], index['CS'], index['Eng']
+    empty = math.count == 0
+    results = {
+        all_students_passed: empty or (math.min >= 5 and cs.min >= 5 and eng.min >= 5),
+        all_students_math_above_3: empty or math.min > 3,
+        exists_student_high_math: not empty and math.max >= 9,
+    }
     
+    # Only students whose CS score beats the lowest Math score can have improved
+    results[exists_student_improved_cs] = not empty and any(
+        columns.cs[i] > columns.math[i] for i in cs.rows_greater_than(math.min))
+    
+    # A counterexample has every score at most 6, so it is inside all three slices
+    candidates = min((math.rows_at_most(6), cs.rows_at_most(6), eng.rows_at_most(6)), key=len)
+    results[for_every_student_exists_subject_above_6] = all(
+        columns.math[i] > 6 or columns.cs[i] > 6 or columns.eng[i] > 6 for i in candidates)
+    
+    # A counterexample has Math below 6 and CS and English at most 6
+    candidates = min((math.rows_less_than(6), cs.rows_at_most(6), eng.rows_at_most(6)), key=len)
+    results[for_struggling_math_exists_subject_above_6] = all(
+        columns.cs[i] > 6 or columns.eng[i] > 6 for i in candidates if columns.math[i] < 6)
+    
+    for negation, positive in NEGATIONS.items():
+        results[negation] = not results[positive]
+    return results
+
+
+# Declarative query language
+#
+#   forall s: s.Math < 6 -> exists subj in {CS,Eng}: s[subj] > 6
+#
+# A query is "forall" or "exists" over students, optionally prefixed by "~",
+# followed by a formula. Formulas combine comparisons with the task1
+# connectives ~ & | and "->" / "<->" (written as > and = in task1, which
+# are comparisons here). Inner "exists x in {...}:" and "forall x in {...}:"
+# range over score columns and extend to the end of the enclosing group.
+QUERY_TOKEN = re.compile(r"\s*(?:(<->|->|<=|>=|==|!=|[<>~&|()\[\]{}.,:])|(\d+(?:\.\d+)?)|([A-Za-z_][A-Za-z0-9_]*))")
+COMPARISONS = {'<', '<=', '>', '>=', '==', '!='}
+CONNECTIVES = {'~': '~', '&': '&', '|': '|', '->': '>', '<->': '='}
+
+COMPARISON_OPERATORS = {'<': lt, '<=': le, '>': gt, '>=': ge, '==': eq, '!=': ne}
+
+
+def tokenize_query(text: str) -> List[str]:
+    """Split a query into tokens, raising ValueError on anything unexpected."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = QUERY_TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"Unexpected character {text[position]!r} at position {position} in {text!r}")
+        tokens.append(match.group(match.lastindex))
+        position = match.end()
+    return tokens
+
+
+class QueryParser:
+    """Recursive descent parser producing a formula tree.
+
+    Tree nodes are tuples: ('cmp', left, op, right) with terms ('field', name)
+    or ('number', value), ('not', x), ('and', [xs]), ('or', [xs]),
+    ('implies', a, b) and ('iff', a, b).
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize_query(text)
+        self.position = 0
+
+    def peek(self) -> str:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected: str = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError(f"Expected {expected or 'more input'} but found {token!r} in {self.text!r}")
+        self.position += 1
+        return token
+
+    def parse_query(self) -> Tuple[bool, str, str, Any]:
+        """Parse the whole query into (negated, quantifier, row variable, formula)."""
+        negated = False
+        while self.peek() == '~':
+            self.take()
+            negated = not negated
+        quantifier = self.take()
+        if quantifier not in ('forall', 'exists'):
+            raise ValueError(f"Query must start with forall or exists: {self.text!r}")
+        variable = self.take()
+        self.take(':')
+        formula = self.parse_formula(variable, {})
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected {self.peek()!r} in {self.text!r}")
+        return negated, quantifier, variable, formula
+
+    def parse_formula(self, row, bound: Dict[str, str]) -> Any:
+        """Parse connectives up to the end of the current group.
+
+        Every comparison or inner quantifier is replaced by a placeholder
+        name, the connective skeleton is parsed with task1's parse_infix,
+        and the postfix result is turned back into a tree.
+        """
+        skeleton = []
+        atoms = {}
+        depth = 0
+        while self.peek() is not None:
+            token = self.peek()
+            if token == ')' and depth == 0:
+                break
+            if token in ('(', ')'):
+                depth += 1 if token == '(' else -1
+                skeleton.append(self.take())
+            elif token in CONNECTIVES:
+                skeleton.append(CONNECTIVES[self.take()])
+            else:
+                name = f"a{len(atoms)}"
+                if token in ('forall', 'exists'):
+                    atoms[name] = self.parse_inner_quantifier(row, bound)
+                else:
+                    atoms[name] = self.parse_comparison(row, bound)
+                skeleton.append(name)
+        
+        if not skeleton:
+            raise ValueError(f"Empty formula in {self.text!r}")
+        try:
+            postfix = parse_infix(" ".join(skeleton))
+        except ValueError:
+            raise ValueError(f"Malformed formula in {self.text!r}") from None
+        
+        stack = []
+        for token in postfix:
+            if token in atoms:
+                stack.append(atoms[token])
+            elif token == '~':
+                stack.append(('not', stack.pop()))
+            else:
+                right = stack.pop()
+                left = stack.pop()
+                if token == '&':
+                    stack.append(('and', [left, right]))
+                elif token == '|':
+                    stack.append(('or', [left, right]))
+                elif token == '>':
+                    stack.append(('implies', left, right))
+                else:
+                    stack.append(('iff', left, right))
+        return stack.pop()
+
+    def parse_inner_quantifier(self, row, bound: Dict[str, str]) -> Any:
+        """Expand "exists x in {A,B}: body" into (body[A] | body[B]), and forall into a conjunction."""
+        quantifier = self.take()
+        variable = self.take()
+        self.take('in')
+        self.take('{')
+        fields = [self.take()]
+        while self.peek() == ',':
+            self.take()
+            fields.append(self.take())
+        self.take('}')
+        self.take(':')
+        for field in fields:
+            if field not in SCORE_COLUMNS:
+                raise ValueError(f"Unknown column {field!r} in {self.text!r}")
+        
+        # Parse the body once per column with the variable bound to that column
+        start = self.position
+        branches = []
+        for field in fields:
+            self.position = start
+            branches.append(self.parse_formula(row, {**bound, variable: field}))
+        return ('or' if quantifier == 'exists' else 'and', branches)
+
+    def parse_term(self, row, bound: Dict[str, str]) -> Any:
+        token = self.take()
+        if token[0].isdigit():
+            return ('number', float(token))
+        if token != row:
+            raise ValueError(f"Unknown name {token!r} in {self.text!r}")
+        if self.peek() == '.':
+            self.take()
+            field = self.take()
+        else:
+            self.take('[')
+            field = self.take()
+            self.take(']')
+            field = bound.get(field, field)
+        if field not in SCORE_COLUMNS:
+            raise ValueError(f"Unknown column {field!r} in {self.text!r}")
+        return ('field', field)
+
+    def parse_comparison(self, row, bound: Dict[str, str]) -> Any:
+        left = self.parse_term(row, bound)
+        op = self.take()
+        if op not in COMPARISONS:
+            raise ValueError(f"Expected a comparison but found {op!r} in {self.text!r}")
+        return ('cmp', left, op, self.parse_term(row, bound))
+
+
+def node_cost(node: Any) -> int:
+    """Estimated cost of evaluating a formula node for one student (one unit per comparison)."""
+    kind = node[0]
+    if kind == 'cmp':
+        return 1
+    if kind in ('and', 'or'):
+        return sum(node_cost(child) for child in node[1])
+    return sum(node_cost(child) for child in node[1:])
+
+
+def optimize_node(node: Any) -> Any:
+    """Flatten nested and/or nodes and order their children cheapest first."""
+    kind = node[0]
+    if kind in ('and', 'or'):
+        children = []
+        for child in map(optimize_node, node[1]):
+            children.extend(child[1] if child[0] == kind else [child])
+        return (kind, sorted(children, key=node_cost))
+    if kind in ('not', 'implies', 'iff'):
+        return (kind,) + tuple(optimize_node(child) for child in node[1:])
+    return node
+
+
+def node_source(node: Any) -> str:
+    """Python expression for a formula node, evaluated on a student record `s`."""
+    kind = node[0]
+    if kind == 'cmp':
+        _, left, op, right = node
+        terms = [f"s[{term[1]!r}]" if term[0] == 'field' else repr(term[1]) for term in (left, right)]
+        return f"{terms[0]} {op} {terms[1]}"
+    if kind == 'not':
+        return f"not ({node_source(node[1])})"
+    if kind == 'and':
+        return " and ".join(f"({node_source(child)})" for child in node[1])
+    if kind == 'or':
+        return " or ".join(f"({node_source(child)})" for child in node[1])
+    if kind == 'implies':
+        return f"not ({node_source(node[1])}) or ({node_source(node[2])})"
+    return f"({node_source(node[1])}) == ({node_source(node[2])})"
+
+
+def node_mask(node: Any, columns: Dict[str, Sequence[float]], size: int) -> List[bool]:
+    """Evaluate a formula node for every row of the given columns at once.
+
+    Conjunctions and disjunctions evaluate their cheapest child first and
+    only look at the rows the remaining children can still change.
+    """
+    kind = node[0]
+    if kind == 'cmp':
+        _, left, op, right = node
+        operands = [columns[term[1]] if term[0] == 'field' else repeat(term[1], size) for term in (left, right)]
+        return list(map(COMPARISON_OPERATORS[op], *operands))
+    if kind == 'not':
+        return [not value for value in node_mask(node[1], columns, size)]
+    if kind == 'implies':
+        return node_mask(('or', [('not', node[1]), node[2]]), columns, size)
+    if kind == 'iff':
+        return list(map(eq, node_mask(node[1], columns, size), node_mask(node[2], columns, size)))
+    
+    # and/or: refine only the rows whose value is still open
+    mask = node_mask(node[1][0], columns, size)
+    for child in node[1][1:]:
+        open_rows = [value == (kind == 'and') for value in mask]
+        count = sum(open_rows)
+        if count == 0:
+            break
+        subset = {name: list(compress(column, open_rows)) for name, column in columns.items()}
+        values = iter(node_mask(child, subset, count))
+        mask = [next(values) if is_open else value for value, is_open in zip(mask, open_rows)]
+    return mask
+
+
+class Query:
+    """A declarative statement compiled into an execution plan.
+
+    For "forall" queries, the premises of implications are pushed down into
+    a domain filter, so only students inside the domain are checked. The
+    remaining predicate is compiled to a short-circuiting Python function
+    with the cheapest conditions first. The plan uses the same
+    (quantifier, predicate, domain) form as STATEMENT_SPECS, so any number
+    of queries run together in one QuantifierEvaluator pass.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.negated, self.quantifier, _, formula = QueryParser(text).parse_query()
+        
+        # Push implication premises down into the domain filter
+        premises = []
+        if self.quantifier == 'forall':
+            while formula[0] == 'implies':
+                premises.append(formula[1])
+                formula = formula[2]
+        self.domain_tree = optimize_node(('and', premises)) if premises else None
+        self.predicate_tree = optimize_node(formula)
+        
+        self.domain = self._compile(self.domain_tree) if self.domain_tree else None
+        self.predicate = self._compile(self.predicate_tree)
+        self.spec = (self.quantifier, self.predicate, self.domain)
+
+    @staticmethod
+    def _compile(tree: Any):
+        return eval(f"lambda s: {node_source(tree)}")
+
+    def __repr__(self) -> str:
+        return f"Query({self.text!r})"
+
+    def explain(self) -> str:
+        """Readable description of the execution plan."""
+        lines = [f"{'not ' if self.negated else ''}{self.quantifier}"]
+        if self.domain_tree:
+            lines.append(f"  filter:    {node_source(self.domain_tree)}")
+        lines.append(f"  predicate: {node_source(self.predicate_tree)}")
+        return "\n".join(lines)
+
+    def evaluate(self, students) -> bool:
+        """Evaluate on records (short-circuiting) or on StudentColumns (column at a time)."""
+        if isinstance(students, StudentColumns):
+            return self.evaluate_columns(students)
+        return evaluate_queries({self.text: self}, students)[self.text]
+
+    def evaluate_columns(self, columns: StudentColumns) -> bool:
+        """Evaluate on columns: filter the domain first, then check only the remaining rows."""
+        data = {name: getattr(columns, attribute) for name, attribute in SCORE_COLUMNS.items()}
+        size = len(columns)
+        if self.domain_tree is not None:
+            in_domain = node_mask(self.domain_tree, data, size)
+            size = sum(in_domain)
+            data = {name: list(compress(column, in_domain)) for name, column in data.items()}
+        
+        values = node_mask(self.predicate_tree, data, size)
+        result = all(values) if self.quantifier == 'forall' else any(values)
+        return not result if self.negated else result
+
+
+@lru_cache(maxsize=256)
+def compile_query(text: str) -> Query:
+    """Compile a query, reusing the plan for queries that were seen before."""
+    return Query(text)
+
+
+# The built-in statements written as queries
+QUERIES = {
+    all_students_passed: "forall s: s.Math >= 5 & s.CS >= 5 & s.Eng >= 5",
+    all_students_math_above_3: "forall s: s.Math > 3",
+    exists_student_high_math: "exists s: s.Math >= 9",
+    exists_student_improved_cs: "exists s: s.CS > s.Math",
+    for_every_student_exists_subject_above_6: "forall s: exists subj in {Math,CS,Eng}: s[subj] > 6",
+    for_struggling_math_exists_subject_above_6: "forall s: s.Math < 6 -> exists subj in {CS,Eng}: s[subj] > 6",
+    not_all_students_passed: "~forall s: s.Math >= 5 & s.CS >= 5 & s.Eng >= 5",
+    not_all_students_math_above_3: "~forall s: s.Math > 3",
+    not_exists_student_high_math: "~exists s: s.Math >= 9",
+    not_exists_student_improved_cs: "~exists s: s.CS > s.Math",
+    not_for_every_student_exists_subject_above_6: "~forall s: exists subj in {Math,CS,Eng}: s[subj] > 6",
+    not_for_struggling_math_exists_subject_above_6: "~forall s: s.Math < 6 -> exists subj in {CS,Eng}: s[subj] > 6",
+}
+
+
+def load_queries(filename: str) -> Dict[str, Query]:
+    """Read named queries from a text file with one "name := query" per line (# starts a comment)."""
+    queries = {}
+    with open(filename, 'r') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name, separator, text = line.partition(':=')
+            if not separator:
+                raise ValueError(f"{filename}:{line_number}: expected 'name := query'")
+            queries[name.strip()] = compile_query(text.strip())
+    return queries
+
+
+def evaluate_queries(queries: Dict[str, Query], students) -> Dict[str, bool]:
+    """Evaluate named queries together.
+
+    Records (a list or any iterable, e.g. a stream) are processed in one
+    short-circuiting pass shared by all queries. StudentColumns are
+    evaluated column at a time, query by query.
+    """
+    if isinstance(students, StudentColumns):
+        return {name: query.evaluate_columns(students) for name, query in queries.items()}
+    
+    plans = list(dict.fromkeys(queries.values()))
+    evaluator = QuantifierEvaluator(plans, {query: query.spec for query in plans})
+    evaluator.feed(students)
+    results = evaluator.finish()
+    return {name: results[query] != query.negated for name, query in queries.items()}
+
+
+def evaluate_queries_csv(queries: Dict[str, Query], filename: str, chunk_size: int = 10000) -> Dict[str, bool]:
+    """Evaluate named queries while streaming a CSV file, stopping once all are decided."""
+    plans = list(dict.fromkeys(queries.values()))
+    evaluator = QuantifierEvaluator(plans, {query: query.spec for query in plans})
+    with closing(iter_student_chunks(filename, chunk_size)) as chunks:
+        for chunk in chunks:
+            if evaluator.feed(chunk):
+                break
+    results = evaluator.finish()
+    return {name: results[query] != query.negated for name, query in queries.items()}
+
+
+def evaluate_all_statements(students, fused: bool = False, hook: Callable[[str, Any, bool, float], None] = None):
+    """Evaluate all predicate logic statements on the student dataset.
+
+    `students` is either the list returned by load_student_data or the
+    StudentColumns returned by load_student_columns. With fused=True every
+    statement is evaluated together in a single pass over the students.
+    If given, hook(name, func, result, seconds) is called after each
+    statement with its result and evaluation time (for fused=True the
+    time of the single pass is reported once, for the first statement).
+    """
     # Evaluate and print results
     print("\nEvaluating predicate logic statements on student data:")
     print("-" * 80)
     
-    for name, func in statements:
+    if fused:
+        records = students.records() if isinstance(students, StudentColumns) else students
+        start = time.perf_counter()
+        results = evaluate_statements_fused(records)
+        elapsed = time.perf_counter() - start
+        for name, func in STATEMENTS:
+            print(f"{name}: {results[func]}")
+            if hook is not None:
+                hook(name, func, results[func], elapsed)
+                elapsed = 0.0
+        return
+    
+    columnar = isinstance(students, StudentColumns)
+    for name, func in STATEMENTS:
+        if columnar:
+            func = VECTORIZED[func]
+        start = time.perf_counter()
         result = func(students)
+        elapsed = time.perf_counter() - start
         print(f"{name}: {result}")
+        if hook is not None:
+            hook(name, func, result, elapsed)
 
 
 def main():
@@ -0,0 +1,296 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+import task3
+
+
+# OAEP hash choices; the hash also sets the message size limit k - 2*hLen - 2
+HASHES = {
+    'sha1': hashes.SHA1,
+    'sha256': hashes.SHA256,
+    'sha384': hashes.SHA384,
+    'sha512': hashes.SHA512,
+}
+
+# Message sizes for the backend comparison (each backend skips sizes above its limit)
+BACKEND_MESSAGE_SIZES = [1, 32, 190, 1024, 16384]
+
+# Columns of the CSV report, one row per measurement
+CSV_FIELDS = ['backend', 'key_size', 'hash', 'operation', 'message_bytes', 'samples',
+              'median_ns', 'p95_ns', 'p99_ns', 'mean_ns', 'ops_per_s']
+
+
+def oaep(hash_name):
+    """OAEP padding with the same hash for the label and MGF1."""
+    algorithm = HASHES[hash_name]()
+    return padding.OAEP(mgf=padding.MGF1(algorithm=algorithm), algorithm=algorithm, label=None)
+
+
+def message_sizes(limit, points):
+    """1 byte, powers of two below the limit, and the limit itself (at most `points` sizes)."""
+    sizes = [1]
+    size = 2
+    while size < limit:
+        sizes.append(size)
+        size *= 2
+    sizes.append(limit)
+    sizes = sorted(set(sizes))
+    if len(sizes) > points:
+        # Keep both ends and thin out the middle evenly
+        step = (len(sizes) - 1) / (points - 1)
+        sizes = sorted({sizes[round(i * step)] for i in range(points)})
+    return sizes
+
+
+def time_ns(function, repeat, warmup):
+    """Run function `warmup` times untimed, then `repeat` times; return durations in nanoseconds."""
+    for _ in range(warmup):
+        function()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        function()
+        durations.append(time.perf_counter_ns() - start)
+    return durations
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, int(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(durations):
+    """Median, tail percentiles and throughput of a list of durations in nanoseconds."""
+    ordered = sorted(durations)
+    median = statistics.median(ordered)
+    return {
+        'samples': len(ordered),
+        'median_ns': median,
+        'p95_ns': percentile(ordered, 0.95),
+        'p99_ns': percentile(ordered, 0.99),
+        'mean_ns': statistics.fmean(ordered),
+        'ops_per_s': 1e9 / median if median else None,
+    }
+
+
+def benchmark_keygen(key_size, repeat):
+    """Time key generation; returns the summary and the last key generated."""
+    keys = []
+    durations = time_ns(lambda: keys.append(rsa.generate_private_key(public_exponent=65537, key_size=key_size)),
+                        repeat, 0)
+    return summarize(durations), keys[-1]
+
+
+def benchmark_key(private_key, hash_names, repeat, warmup, points):
+    """Time encryption and decryption at every message size for each hash on one key."""
+    public_key = private_key.public_key()
+    results = {}
+    for hash_name in hash_names:
+        limit = task3.oaep_max_message_length(private_key.key_size, HASHES[hash_name]())
+        if limit < 1:
+            # e.g. SHA-512 does not fit in a 1024-bit key at all
+            results[hash_name] = {'limit_bytes': limit, 'skipped': True}
+            continue
+        padding_object = oaep(hash_name)
+
+        # The limit must be exact: limit bytes encrypt, limit + 1 bytes do not
+        public_key.encrypt(os.urandom(limit), padding_object)
+        try:
+            public_key.encrypt(os.urandom(limit + 1), padding_object)
+            limit_exact = False
+        except ValueError:
+            limit_exact = True
+
+        sizes = {}
+        for size in message_sizes(limit, points):
+            message = os.urandom(size)
+            ciphertext = public_key.encrypt(message, padding_object)
+            assert private_key.decrypt(ciphertext, padding_object) == message
+            sizes[size] = {
+                'encrypt': summarize(time_ns(lambda: public_key.encrypt(message, padding_object), repeat, warmup)),
+                'decrypt': summarize(time_ns(lambda: private_key.decrypt(ciphertext, padding_object), repeat, warmup)),
+            }
+        results[hash_name] = {'limit_bytes': limit, 'limit_exact': limit_exact, 'sizes': sizes}
+    return results
+
+
+def benchmark_backend(name, key_size, repeat, warmup, keygen_repeat, sizes=None):
+    """Time key generation, encryption and decryption of one task3 backend."""
+    backend = task3.get_backend(name)
+    keys = []
+    keygen = summarize(time_ns(lambda: keys.append(backend.generate_keys(key_size)), keygen_repeat, 0))
+    private_key, public_key = keys[-1]
+    limit = backend.max_message_length(public_key)
+
+    results = {}
+    for size in sizes or BACKEND_MESSAGE_SIZES:
+        if limit is not None and size > limit:
+            continue
+        message = os.urandom(size)
+        ciphertext = backend.encrypt(message, public_key)
+        assert backend.decrypt(ciphertext, private_key) == message
+        results[size] = {
+            'ciphertext_bytes': len(ciphertext),
+            'encrypt': summarize(time_ns(lambda: backend.encrypt(message, public_key), repeat, warmup)),
+            'decrypt': summarize(time_ns(lambda: backend.decrypt(ciphertext, private_key), repeat, warmup)),
+        }
+    return {'keygen': keygen, 'limit_bytes': limit, 'sizes': results}
+
+
+def run_benchmarks(key_sizes, hash_names, repeat, warmup, keygen_repeat, points, backends=(),
+                   backend_key_size=2048):
+    """Benchmark every key size and hash and return a JSON-ready report."""
+    report = {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'config': {
+            'key_sizes': key_sizes,
+            'hashes': hash_names,
+            'repeat': repeat,
+            'warmup': warmup,
+            'keygen_repeat': keygen_repeat,
+            'points': points,
+            'backends': list(backends),
+            'backend_key_size': backend_key_size,
+        },
+        'results': [],
+        'backends': {},
+    }
+
+    for key_size in key_sizes:
+        keygen, private_key = benchmark_keygen(key_size, keygen_repeat)
+        result = {
+            'key_size': key_size,
+            'keygen': keygen,
+            'hashes': benchmark_key(private_key, hash_names, repeat, warmup, points),
+        }
+        report['results'].append(result)
+
+        sha = result['hashes'].get('sha256') or next(iter(result['hashes'].values()))
+        largest = sha.get('sizes', {}).get(sha['limit_bytes'], {})
+        print(f"key={key_size:5d} keygen={keygen['median_ns'] / 1e6:9.2f}ms "
+              f"limit={sha['limit_bytes']}B "
+              f"decrypt={largest.get('decrypt', {}).get('ops_per_s', 0):9.1f} ops/s", file=sys.stderr)
+
+    # Every backend on the same message sizes, to compare RSA-OAEP with the alternatives
+    for name in backends:
+        result = benchmark_backend(name, backend_key_size, repeat, warmup, keygen_repeat)
+        report['backends'][name] = result
+        smallest = next(iter(result['sizes'].values()))
+        print(f"backend={name:8s} keygen={result['keygen']['median_ns'] / 1e6:9.2f}ms "
+              f"encrypt={smallest['encrypt']['ops_per_s']:9.1f} ops/s "
+              f"decrypt={smallest['decrypt']['ops_per_s']:9.1f} ops/s", file=sys.stderr)
+
+    return report
+
+
+def report_rows(report):
+    """Flatten a report into CSV rows."""
+    rows = []
+    for result in report['results']:
+        rows.append(dict(backend='rsa', key_size=result['key_size'], hash='', operation='keygen',
+                         message_bytes='', **result['keygen']))
+        for hash_name, hash_result in result['hashes'].items():
+            for size, operations in hash_result.get('sizes', {}).items():
+                for operation, summary in operations.items():
+                    rows.append(dict(backend='rsa', key_size=result['key_size'], hash=hash_name,
+                                     operation=operation, message_bytes=size, **summary))
+    key_size = report['config']['backend_key_size']
+    for name, result in report['backends'].items():
+        size_label = key_size if name == 'rsa' else ''
+        rows.append(dict(backend=name, key_size=size_label, hash='', operation='keygen', message_bytes='',
+                         **result['keygen']))
+        for size, operations in result['sizes'].items():
+            for operation in ('encrypt', 'decrypt'):
+                rows.append(dict(backend=name, key_size=size_label, hash='', operation=operation,
+                                 message_bytes=size, **operations[operation]))
+    return rows
+
+
+def write_csv(report, filename):
+    with open(filename, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(report_rows(report))
+
+
+def plot_report(report, filename, hash_name='sha256'):
+    """Plot median encryption and decryption time against message size for every key size."""
+    # Plotting is optional, so matplotlib is only needed when asked for
+    import matplotlib.pyplot as plt
+
+    figure, (encrypt_axis, decrypt_axis) = plt.subplots(1, 2, figsize=(12, 5))
+    for result in report['results']:
+        sizes = result['hashes'].get(hash_name, {}).get('sizes', {})
+        if not sizes:
+            continue
+        lengths = list(sizes)
+        encrypt_axis.plot(lengths, [sizes[n]['encrypt']['median_ns'] / 1e3 for n in lengths], '-o',
+                          label=f"{result['key_size']} bits")
+        decrypt_axis.plot(lengths, [sizes[n]['decrypt']['median_ns'] / 1e3 for n in lengths], '-o',
+                          label=f"{result['key_size']} bits")
+    for axis, title in ((encrypt_axis, 'Encryption'), (decrypt_axis, 'Decryption')):
+        axis.set_xlabel('Message length (bytes)')
+        axis.set_ylabel('Median time (µs)')
+        axis.set_yscale('log')
+        axis.set_title(f"RSA-OAEP ({hash_name.upper()}) {title}")
+        axis.legend()
+        axis.grid(True)
+    figure.tight_layout()
+    figure.savefig(filename)
+    print(f"Performance plot saved as '{filename}'", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RSA key generation and OAEP encryption/decryption")
+    parser.add_argument('--key-sizes', type=int, nargs='+', default=[1024, 2048, 3072, 4096])
+    parser.add_argument('--hashes', nargs='+', default=['sha256'], choices=list(HASHES))
+    parser.add_argument('--repeat', type=int, default=200, help="timed runs per measurement")
+    parser.add_argument('--warmup', type=int, default=20, help="untimed runs before each measurement")
+    parser.add_argument('--keygen-repeat', type=int, default=5, help="key generations per key size")
+    parser.add_argument('--points', type=int, default=6, help="message sizes per key size and hash")
+    parser.add_argument('--backends', nargs='*', default=list(task3.BACKENDS), choices=list(task3.BACKENDS),
+                        help="task3 backends to compare (none to skip the comparison)")
+    parser.add_argument('--backend-key-size', type=int, default=2048, help="RSA key size for the comparison")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    parser.add_argument('--csv', help="also write the measurements as CSV")
+    parser.add_argument('--plot', help="also plot the results to this image file (needs matplotlib)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.key_sizes, args.hashes, args.repeat, args.warmup, args.keygen_repeat,
+                            max(2, args.points), args.backends, args.backend_key_size)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Benchmark report saved as '{args.output}'", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"CSV report saved as '{args.csv}'", file=sys.stderr)
+
+    if args.plot:
+        plot_report(report, args.plot, args.hashes[0])
+
+    if not all(hash_result.get('limit_exact', True) for result in report['results']
+               for hash_result in result['hashes'].values()):
+        print("OAEP message limit is not where expected!", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import secrets
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import service
+from benchmark import percentile
+
+
+class ServiceError(Exception):
+    """An error reported by the encryption service for one request."""
+
+
+class ServiceConnection:
+    """One connection to the encryption service, with many requests in flight at once."""
+
+    def __init__(self, path=None, host=None, port=8765, token=None):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.token = token
+        self.reader = None
+        self.writer = None
+        self.receiver = None
+        self.waiting = {}
+        self.ids = itertools.count()
+
+    async def connect(self):
+        if self.host is not None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=service.MAX_LINE)
+        else:
+            path = self.path or service.default_socket_path()
+            self.reader, self.writer = await asyncio.open_unix_connection(path, limit=service.MAX_LINE)
+        self.receiver = asyncio.create_task(self.receive())
+
+    @property
+    def connected(self):
+        return self.receiver is not None and not self.receiver.done()
+
+    async def receive(self):
+        """Route every response line to the request waiting for its id."""
+        error = ConnectionError("Connection to the encryption service closed")
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self.waiting.pop(response.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if response.get('ok'):
+                    future.set_result(base64.b64decode(response['data']))
+                else:
+                    future.set_exception(ServiceError(response.get('error')))
+        except Exception as e:
+            error = e
+        finally:
+            # Fail whatever is still waiting; the pool reconnects on the next request
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(error)
+            self.waiting.clear()
+
+    async def request(self, op, data=b'', backend=None):
+        """Send one request and wait for its result bytes; raises ServiceError on failure."""
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        message = {'id': request_id, 'op': op, 'data': base64.b64encode(data).decode('ascii')}
+        if backend is not None:
+            message['backend'] = backend
+        if self.token is not None:
+            message['token'] = self.token
+        self.writer.write(json.dumps(message).encode('utf-8') + b'\n')
+        # Waits here when the service stops reading (backpressure)
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        if self.receiver is not None:
+            await asyncio.gather(self.receiver, return_exceptions=True)
+
+
+class ServicePool:
+    """A pool of connections to the encryption service, used round-robin.
+
+    Connections go to the Unix socket `path` (the service's default socket
+    if None), or to TCP (host, port) when a host is given. They are opened
+    on first use and reopened if they drop. Use it as an async context
+    manager, or call close() when done.
+    """
+
+    def __init__(self, path=None, host=None, port=8765, size=4, token=None):
+        self.connections = [ServiceConnection(path, host, port, token) for _ in range(size)]
+        self.next = itertools.cycle(range(size))
+        self.locks = [asyncio.Lock() for _ in range(size)]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def connection(self):
+        index = next(self.next)
+        connection = self.connections[index]
+        if not connection.connected:
+            async with self.locks[index]:
+                if not connection.connected:
+                    await connection.connect()
+        return connection
+
+    async def request(self, op, data=b'', backend=None):
+        connection = await self.connection()
+        return await connection.request(op, data, backend)
+
+    async def encrypt(self, message, backend=None):
+        """Encrypt a short message with the service key (encrypt_message)."""
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        return await self.request('encrypt', message, backend)
+
+    async def decrypt(self, ciphertext, backend=None):
+        """Decrypt a ciphertext from encrypt(); returns bytes."""
+        return await self.request('decrypt', ciphertext, backend)
+
+    async def encrypt_hybrid(self, message, backend=None):
+        """Encrypt a message of any size (encrypt_stream)."""
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        return await self.request('encrypt_hybrid', message, backend)
+
+    async def decrypt_hybrid(self, ciphertext, backend=None):
+        """Decrypt a ciphertext from encrypt_hybrid(); returns bytes."""
+        return await self.request('decrypt_hybrid', ciphertext, backend)
+
+    async def public_key(self, backend=None):
+        """DER-encoded public key the service uses for this backend."""
+        return await self.request('public_key', b'', backend)
+
+    async def close(self):
+        await asyncio.gather(*(connection.close() for connection in self.connections))
+
+
+async def run_load(pool, op, requests, concurrency, message_size, backend=None):
+    """Send `requests` requests with `concurrency` in flight and return a latency report.
+
+    Decrypt operations first encrypt one message through the service and
+    then decrypt that ciphertext repeatedly.
+    """
+    message = os.urandom(message_size)
+    payload = message
+    if op == 'decrypt':
+        payload = await pool.encrypt(message, backend)
+    elif op == 'decrypt_hybrid':
+        payload = await pool.encrypt_hybrid(message, backend)
+
+    latencies = []
+    errors = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter_ns()
+            try:
+                result = await pool.request(op, payload, backend)
+                if op.startswith('decrypt') and result != message:
+                    raise ServiceError("Decrypted message does not match")
+                latencies.append(time.perf_counter_ns() - start)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    report = {
+        'op': op,
+        'backend': backend,
+        'requests': requests,
+        'concurrency': concurrency,
+        'message_bytes': message_size,
+        'completed': len(latencies),
+        'errors': len(errors),
+        'first_errors': errors[:5],
+        'elapsed_s': elapsed,
+        'requests_per_s': len(latencies) / elapsed if elapsed else None,
+    }
+    if ordered:
+        report.update({
+            'mean_ms': statistics.fmean(ordered) / 1e6,
+            'p50_ms': percentile(ordered, 0.50) / 1e6,
+            'p95_ms': percentile(ordered, 0.95) / 1e6,
+            'p99_ms': percentile(ordered, 0.99) / 1e6,
+            'max_ms': ordered[-1] / 1e6,
+        })
+    return report
+
+
+async def run_load_test(args):
+    server = None
+    test_service = None
+    directory = None
+    host = args.host if args.tcp else None
+    path = args.unix
+    token = os.environ.get(service.TOKEN_ENV) or None
+    if args.spawn:
+        # Run a service in this process for a self-contained measurement, on a
+        # private socket (or with a one-off token) so a running service is left alone
+        if args.tcp:
+            token = token or secrets.token_hex(16)
+        elif path is None:
+            directory = tempfile.mkdtemp()
+            path = os.path.join(directory, 'service.sock')
+        test_service = service.EncryptionService(workers=args.workers, token=token)
+        server = await service.serve(test_service, path, host, args.port)
+    try:
+        async with ServicePool(path, host, args.port, args.connections, token) as pool:
+            reports = []
+            for concurrency in args.concurrency:
+                report = await run_load(pool, args.op, args.requests, concurrency, args.size, args.backend)
+                reports.append(report)
+                print(f"concurrency={concurrency:4d} {report['requests_per_s'] or 0:9.1f} req/s "
+                      f"p50={report.get('p50_ms', 0):8.3f}ms p95={report.get('p95_ms', 0):8.3f}ms "
+                      f"p99={report.get('p99_ms', 0):8.3f}ms errors={report['errors']}", file=sys.stderr)
+            return reports
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+            await test_service.close()
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate load against the task3 encryption service")
+    parser.add_argument('--unix', help="Unix socket path (default: the service's per-user socket)")
+    parser.add_argument('--tcp', action='store_true',
+                        help=f"connect over TCP host:port instead (sends ${service.TOKEN_ENV})")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--op', default='decrypt',
+                        choices=['encrypt', 'decrypt', 'encrypt_hybrid', 'decrypt_hybrid', 'ping'])
+    parser.add_argument('--backend', default=None, help="service backend (default: the service's first)")
+    parser.add_argument('--requests', type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 64],
+                        help="requests in flight at once")
+    parser.add_argument('--connections', type=int, default=4, help="pooled connections")
+    parser.add_argument('--size', type=int, default=32, help="message size in bytes")
+    parser.add_argument('--spawn', action='store_true', help="start a service in this process first")
+    parser.add_argument('--workers', type=int, default=None, help="executor threads of a spawned service")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    reports = asyncio.run(run_load_test(args))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(reports, file, indent=2)
+        print(f"Load report saved as '{args.output}'", file=sys.stderr)
+    else:
+        json.dump(reports, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+import argparse
+import asyncio
+import base64
+import hmac
+import io
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from cryptography.hazmat.primitives import serialization
+
+import task3
+
+
+# Protocol
+#
+# JSON lines over a Unix domain socket (owner-only, the default) or TCP. A
+# request is {"id": ..., "op": ..., "data": <base64>, "backend": ...,
+# "token": ...} and its response {"id": ..., "ok": true, "data": <base64>}
+# or {"id": ..., "ok": false, "error": ...}. Responses may arrive out of
+# order and are matched by id. The token is required when the service has
+# one, which it must over TCP, where anyone who can connect could use it.
+#
+# Operations: encrypt / decrypt (one short message, encrypt_message and
+# decrypt_message), encrypt_hybrid / decrypt_hybrid (any size, encrypt_stream
+# and decrypt_stream), public_key (DER of the service key) and ping.
+
+# Largest request or response line; hybrid payloads travel base64-encoded in one line
+MAX_LINE = 64 * 1024 * 1024
+
+# Request bytes one connection may have unanswered before the service stops reading it
+MAX_PENDING_BYTES = 64 * 1024 * 1024
+
+# Environment variable holding the shared token clients must send (required for TCP)
+TOKEN_ENV = 'TASK3_SERVICE_TOKEN'
+
+OPERATIONS = {'encrypt', 'decrypt', 'encrypt_hybrid', 'decrypt_hybrid', 'public_key', 'ping'}
+
+
+def default_socket_path():
+    """Per-user socket path: $XDG_RUNTIME_DIR/task3/service.sock, else task3-<uid>/service.sock in the temp directory."""
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'task3', 'service.sock')
+    return os.path.join(tempfile.gettempdir(), f"task3-{os.getuid()}", 'service.sock')
+
+
+def hybrid_encrypt_items(messages, public_key):
+    """encrypt_stream() every message, capturing errors per item."""
+    results = []
+    for message in messages:
+        try:
+            output = io.BytesIO()
+            task3.encrypt_stream(io.BytesIO(message), output, public_key)
+            results.append(task3.BatchItem(output.getvalue(), None))
+        except Exception as e:
+            results.append(task3.BatchItem(None, e))
+    return results
+
+
+def hybrid_decrypt_items(ciphertexts, private_key):
+    """decrypt_stream() every ciphertext, capturing errors per item."""
+    results = []
+    for ciphertext in ciphertexts:
+        try:
+            output = io.BytesIO()
+            task3.decrypt_stream(io.BytesIO(ciphertext), output, private_key)
+            results.append(task3.BatchItem(output.getvalue(), None))
+        except Exception as e:
+            results.append(task3.BatchItem(None, e))
+    return results
+
+
+class EncryptionService:
+    """Hold one key pair per backend and serve batched encrypt/decrypt requests.
+
+    Requests from all connections go through one bounded queue. A batcher
+    takes up to max_batch requests at a time (waiting at most batch_delay
+    seconds for more to arrive if every worker is busy), groups them by operation and backend and
+    runs each group on the executor. A connection stops reading new
+    requests while max_pending of its requests, or max_pending_bytes of
+    request data, are unanswered or the queue is full, so a client that
+    sends too fast is slowed down by its own socket buffers. With a token,
+    requests that do not carry it are refused.
+    """
+
+    def __init__(self, backends=('rsa', 'x25519'), key_size=2048, key_manager=None, max_batch=64,
+                 batch_delay=0.002, queue_size=1024, workers=None, max_pending=256,
+                 max_pending_bytes=MAX_PENDING_BYTES, token=None):
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_pending_bytes = max_pending_bytes
+        self.token = token
+        self.batch_delay = batch_delay
+        self.queue_size = queue_size
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.keys = {}
+        for name in backends:
+            backend = task3.get_backend(name)
+            if key_manager is not None and isinstance(backend, task3.RSABackend):
+                self.keys[name] = key_manager.get_keys(key_size, backend.public_exponent)
+            else:
+                self.keys[name] = backend.generate_keys(key_size)
+        self.default_backend = backends[0]
+        self.queue = None
+        self.slots = None
+        self.batcher = None
+        self.running = set()
+
+    async def start(self):
+        """Create the request queue and start the batcher (done by serve() automatically)."""
+        if self.batcher is None:
+            self.queue = asyncio.Queue(maxsize=self.queue_size)
+            # At most one batch per worker in flight; further batches wait in the queue
+            self.slots = asyncio.Semaphore(self.workers)
+            self.batcher = asyncio.create_task(self.run_batcher())
+
+    async def close(self):
+        if self.batcher is not None:
+            self.batcher.cancel()
+            await asyncio.gather(self.batcher, *self.running, return_exceptions=True)
+            self.batcher = None
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, op, data, backend=None):
+        """Queue one operation and wait for its result (bytes); errors are raised."""
+        backend = backend or self.default_backend
+        if backend not in self.keys:
+            raise ValueError(f"Backend not available: {backend}")
+        if op == 'ping':
+            return b''
+        if op == 'public_key':
+            return self.keys[backend][1].public_bytes(
+                encoding=serialization.Encoding.DER,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {op}")
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((op, backend, data, future))
+        return await future
+
+    async def run_batcher(self):
+        """Collect queued requests into batches and dispatch them to the executor."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                # With a worker free there is no point waiting for a fuller batch
+                if not self.slots.locked():
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            groups = {}
+            for op, backend, data, future in batch:
+                groups.setdefault((op, backend), []).append((data, future))
+            for (op, backend), items in groups.items():
+                await self.slots.acquire()
+                task = asyncio.create_task(self.run_group(op, backend, items))
+                self.running.add(task)
+                task.add_done_callback(self.running.discard)
+
+    async def run_group(self, op, backend, items):
+        """Run one batch of a single operation on the executor and resolve its futures."""
+        try:
+            private_key, public_key = self.keys[backend]
+            payloads = [data for data, _ in items]
+            if op == 'encrypt':
+                function = partial(task3.encrypt_items, public_key=public_key)
+            elif op == 'decrypt':
+                function = partial(task3.decrypt_items, private_key=private_key, as_text=False)
+            elif op == 'encrypt_hybrid':
+                function = partial(hybrid_encrypt_items, public_key=public_key)
+            else:
+                function = partial(hybrid_decrypt_items, private_key=private_key)
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, function, payloads)
+            for (_, future), result in zip(items, results):
+                if future.done():
+                    continue
+                if result.error is not None:
+                    future.set_exception(result.error)
+                else:
+                    future.set_result(result.value)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.slots.release()
+
+    async def handle_connection(self, reader, writer):
+        """Serve one client connection until it closes."""
+        pending = set()
+        slots = asyncio.Semaphore(self.max_pending)
+        pending_bytes = 0
+        drained = asyncio.Event()
+
+        def finished(size):
+            nonlocal pending_bytes
+            pending_bytes -= size
+            drained.set()
+            slots.release()
+
+        try:
+            while True:
+                # Stop reading while too many of this connection's requests, or too
+                # many bytes of them, are in flight
+                await slots.acquire()
+                while pending_bytes >= self.max_pending_bytes:
+                    drained.clear()
+                    await drained.wait()
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self.respond(writer, {'id': None, 'ok': False, 'error': "Request too large"})
+                    break
+                if not line:
+                    break
+                pending_bytes += len(line)
+                task = asyncio.create_task(self.handle_request(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                task.add_done_callback(lambda _, size=len(line): finished(size))
+            await asyncio.gather(*pending, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+    async def handle_request(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            if self.token is not None and not hmac.compare_digest(str(request.get('token', '')).encode('utf-8'),
+                                                                  self.token.encode('utf-8')):
+                raise PermissionError("Missing or wrong token")
+            data = base64.b64decode(request.get('data') or '')
+            result = await self.submit(request.get('op'), data, request.get('backend'))
+            response = {'id': request_id, 'ok': True, 'data': base64.b64encode(result).decode('ascii')}
+        except Exception as e:
+            response = {'id': request_id, 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        await self.respond(writer, response)
+
+    async def respond(self, writer, response):
+        writer.write(json.dumps(response).encode('utf-8') + b'\n')
+        await writer.drain()
+
+
+async def serve(service, path=None, host=None, port=8765):
+    """Start serving and return the asyncio server.
+
+    Without a host the service listens on the Unix socket `path` (by default
+    default_socket_path()), which only its owner can connect to. With a host
+    it listens on TCP (host, port), which needs a service token.
+    """
+    if host is not None:
+        if service.token is None:
+            raise ValueError("A TCP service needs a token")
+        await service.start()
+        return await asyncio.start_server(service.handle_connection, host, port, limit=MAX_LINE)
+
+    if path is None:
+        path = default_socket_path()
+        # Our own directory, closed to other users
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        if os.stat(os.path.dirname(path)).st_uid != os.getuid():
+            raise PermissionError(f"Socket directory belongs to another user: {os.path.dirname(path)}")
+        os.chmod(os.path.dirname(path), 0o700)
+    await service.start()
+    # Create the socket as 0600 from the start rather than narrowing it afterwards
+    umask = os.umask(0o177)
+    try:
+        return await asyncio.start_unix_server(service.handle_connection, path=path, limit=MAX_LINE)
+    finally:
+        os.umask(umask)
+
+
+async def run_service(args):
+    key_manager = task3.KeyManager(pool_size=0) if args.key_cache else None
+    service = EncryptionService(args.backends, args.key_size, key_manager, args.max_batch,
+                                args.batch_delay, args.queue_size, args.workers, args.max_pending,
+                                args.max_pending_bytes, os.environ.get(TOKEN_ENV) or None)
+    host = args.host if args.tcp else None
+    server = await serve(service, args.unix, host, args.port)
+    where = f"{args.host}:{args.port}" if args.tcp else args.unix or default_socket_path()
+    print(f"Encryption service listening on {where} (backends: {', '.join(args.backends)})", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve task3 encryption over a local socket")
+    parser.add_argument('--unix', help="Unix socket path (default: a per-user socket)")
+    parser.add_argument('--tcp', action='store_true', help=f"listen on TCP host:port instead (needs ${TOKEN_ENV})")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--backends', nargs='+', default=['rsa', 'x25519'], choices=list(task3.BACKENDS),
+                        help="backends to serve; the first one is the default")
+    parser.add_argument('--key-size', type=int, default=2048, help="RSA key size")
+    parser.add_argument('--key-cache', action='store_true', help="load RSA keys from the KeyManager cache")
+    parser.add_argument('--max-batch', type=int, default=64, help="requests per executor batch")
+    parser.add_argument('--batch-delay', type=float, default=0.002, help="seconds to wait for a batch to fill")
+    parser.add_argument('--queue-size', type=int, default=1024, help="queued requests before backpressure")
+    parser.add_argument('--workers', type=int, default=None, help="executor threads")
+    parser.add_argument('--max-pending', type=int, default=256, help="unanswered requests per connection")
+    parser.add_argument('--max-pending-bytes', type=int, default=MAX_PENDING_BYTES,
+                        help="unanswered request bytes per connection")
+    args = parser.parse_args()
+    if args.tcp and not os.environ.get(TOKEN_ENV):
+        parser.error(f"--tcp needs a shared token in ${TOKEN_ENV}")
+    try:
+        asyncio.run(run_service(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,481 @@
+import io
+import os
+from abc import ABC, abstractmethod
+import struct
 import time
 import random
-import matplotlib.pyplot as plt
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives import hashes
+import statistics
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from cryptography.hazmat.primitives.asymmetric import rsa, padding, x25519
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
-def generate_rsa_keys(key_size=2048):
-    """Generate RSA public and private keys."""
+# OAEP padding used for every RSA operation; the object is immutable, so one instance is shared
+OAEP_PADDING = padding.OAEP(
+    mgf=padding.MGF1(algorithm=hashes.SHA256()),
+    algorithm=hashes.SHA256(),
+    label=None
+)
+
+# Environment variable that overrides where KeyManager keeps its PEM files
+KEY_CACHE_ENV = 'TASK3_KEY_CACHE'
+
+def default_key_cache_dir():
+    """Per-user directory for cached private keys: $TASK3_KEY_CACHE, else ~/.cache/task3/rsa_keys."""
+    if os.environ.get(KEY_CACHE_ENV):
+        return os.environ[KEY_CACHE_ENV]
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'task3', 'rsa_keys')
+
+def private_key_to_pem(private_key):
+    """Serialize a private key to unencrypted PKCS#8 PEM bytes."""
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+def private_key_from_pem(data):
+    """Load a private key from PEM bytes we wrote ourselves.
+    The RSA consistency checks are skipped: they cost more than the rest of the load."""
+    return serialization.load_pem_private_key(data, password=None, unsafe_skip_rsa_key_validation=True)
+
+def generate_private_key_pem(key_size=2048, public_exponent=65537):
+    """Generate a private key and return it as PEM bytes.
+    Used by KeyManager's worker processes, since key objects cannot be pickled."""
+    private_key = rsa.generate_private_key(public_exponent=public_exponent, key_size=key_size)
+    return private_key_to_pem(private_key)
+
+class KeyManager:
+    """Hand out RSA key pairs without paying for key generation on every call.
+    
+    get_keys() returns a long-lived key pair per (key size, exponent), kept
+    in memory and persisted as PEM in cache_dir (a per-user directory by
+    default, see default_key_cache_dir). fresh_keys() returns a key pair
+    that has never been handed out before, taken from a pool that
+    background processes keep filled with pool_size keys per key size.
+    """
+    
+    def __init__(self, cache_dir=None, pool_size=2, workers=1):
+        self.cache_dir = cache_dir or default_key_cache_dir()
+        self.pool_size = pool_size
+        self.workers = workers
+        self.loaded = {}
+        self.pools = {}
+        self.executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def cache_path(self, key_size, public_exponent):
+        return os.path.join(self.cache_dir, f"rsa-{key_size}-{public_exponent}.pem")
+    
+    def get_keys(self, key_size=2048, public_exponent=65537):
+        """Return the cached (private_key, public_key) pair for this size and exponent."""
+        config = (key_size, public_exponent)
+        if config not in self.loaded:
+            path = self.cache_path(key_size, public_exponent)
+            try:
+                with open(path, 'rb') as file:
+                    private_key = private_key_from_pem(file.read())
+            except (OSError, ValueError):
+                private_key = None
+            # The file name is no guarantee: the key must really have this size and exponent
+            if not (isinstance(private_key, rsa.RSAPrivateKey) and private_key.key_size == key_size
+                    and private_key.public_key().public_numbers().e == public_exponent):
+                # Missing, unreadable or wrong: take a key from the pool (or generate one) and persist it
+                private_key, _ = self.fresh_keys(key_size, public_exponent)
+                self.save(private_key, path)
+            self.loaded[config] = (private_key, private_key.public_key())
+        return self.loaded[config]
+    
+    def save(self, private_key, path):
+        """Write a private key to path as PEM, readable only by the owner."""
+        # makedirs does not change an existing directory, and the keys are loaded
+        # without validation, so make sure only the owner can touch them
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        os.chmod(self.cache_dir, 0o700)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(private_key_to_pem(private_key))
+        os.replace(temporary, path)
+    
+    def fresh_keys(self, key_size=2048, public_exponent=65537):
+        """Return a new (private_key, public_key) pair that no other caller has received."""
+        pool = self.fill_pool(key_size, public_exponent)
+        if pool:
+            private_key = private_key_from_pem(pool.popleft().result())
+        else:
+            private_key = rsa.generate_private_key(public_exponent=public_exponent, key_size=key_size)
+        # Replace the key we just took
+        self.fill_pool(key_size, public_exponent)
+        return private_key, private_key.public_key()
+    
+    def fill_pool(self, key_size=2048, public_exponent=65537):
+        """Start background generation until the pool for this size holds pool_size keys."""
+        pool = self.pools.setdefault((key_size, public_exponent), deque())
+        if self.pool_size > 0 and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        while len(pool) < self.pool_size:
+            pool.append(self.executor.submit(generate_private_key_pem, key_size, public_exponent))
+        return pool
+    
+    def close(self):
+        """Stop the background workers, abandoning keys that are still being generated."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.pools.clear()
+
+class AsymmetricBackend(ABC):
+    """A public-key encryption scheme: key generation plus encrypt/decrypt of short messages."""
+    name = None
+    
+    @abstractmethod
+    def generate_keys(self, key_size=None):
+        """Return a new (private_key, public_key) pair."""
+    
+    @abstractmethod
+    def encrypt(self, message, public_key):
+        """Encrypt a message for the holder of the private key."""
+    
+    @abstractmethod
+    def decrypt(self, ciphertext, private_key):
+        """Decrypt a ciphertext from encrypt()."""
+    
+    def max_message_length(self, public_key):
+        """Largest message in bytes that encrypt() accepts, or None if there is no limit."""
+        return None
+
+class RSABackend(AsymmetricBackend):
+    """RSA with OAEP padding (SHA-256 by default)."""
+    name = 'rsa'
+    
+    def __init__(self, public_exponent=65537, oaep=OAEP_PADDING):
+        self.public_exponent = public_exponent
+        self.oaep = oaep
+    
+    def generate_keys(self, key_size=2048):
+        private_key = rsa.generate_private_key(public_exponent=self.public_exponent, key_size=key_size or 2048)
+        return private_key, private_key.public_key()
+    
+    def encrypt(self, message, public_key):
+        return public_key.encrypt(message, self.oaep)
+    
+    def decrypt(self, ciphertext, private_key):
+        return private_key.decrypt(ciphertext, self.oaep)
+    
+    def max_message_length(self, public_key):
+        # The limit depends on the OAEP label hash, so take it from the padding itself
+        return oaep_max_message_length(public_key.key_size, self.oaep.algorithm)
+
+class X25519Backend(AsymmetricBackend):
+    """ECIES-style encryption: ephemeral X25519 key agreement, HKDF-SHA256 and AES-256-GCM.
+    
+    Ciphertext layout: the 32-byte ephemeral public key, then the AES-GCM
+    ciphertext and tag. Every message has its own ephemeral key, so the
+    AES key and nonce are both derived with HKDF from the shared secret.
+    """
+    name = 'x25519'
+    INFO = b'task3 x25519-hkdf-sha256-aes256gcm'
+    
+    def generate_keys(self, key_size=None):
+        private_key = x25519.X25519PrivateKey.generate()
+        return private_key, private_key.public_key()
+    
+    def derive(self, shared_secret, ephemeral_bytes, recipient_bytes):
+        """AES key and nonce bound to both public keys."""
+        material = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32 + 12,
+            salt=None,
+            info=self.INFO + ephemeral_bytes + recipient_bytes
+        ).derive(shared_secret)
+        return AESGCM(material[:32]), material[32:]
+    
+    def encrypt(self, message, public_key):
+        ephemeral = x25519.X25519PrivateKey.generate()
+        ephemeral_bytes = ephemeral.public_key().public_bytes_raw()
+        aesgcm, nonce = self.derive(ephemeral.exchange(public_key), ephemeral_bytes, public_key.public_bytes_raw())
+        return ephemeral_bytes + aesgcm.encrypt(nonce, message, None)
+    
+    def decrypt(self, ciphertext, private_key):
+        if len(ciphertext) < 32 + TAG_SIZE:
+            raise ValueError("Ciphertext too short")
+        ephemeral_bytes = bytes(ciphertext[:32])
+        ephemeral = x25519.X25519PublicKey.from_public_bytes(ephemeral_bytes)
+        recipient_bytes = private_key.public_key().public_bytes_raw()
+        aesgcm, nonce = self.derive(private_key.exchange(ephemeral), ephemeral_bytes, recipient_bytes)
+        return aesgcm.decrypt(nonce, bytes(ciphertext[32:]), None)
+
+# Available backends by name
+BACKENDS = {
+    'rsa': RSABackend(),
+    'x25519': X25519Backend(),
+}
+
+def get_backend(backend=None, key=None):
+    """Resolve a backend given by name or instance; if None, pick it from the key type (default RSA)."""
+    if isinstance(backend, AsymmetricBackend):
+        return backend
+    if backend is not None:
+        try:
+            return BACKENDS[backend]
+        except KeyError:
+            raise ValueError(f"Unknown backend: {backend}") from None
+    if isinstance(key, (x25519.X25519PrivateKey, x25519.X25519PublicKey)):
+        return BACKENDS['x25519']
+    return BACKENDS['rsa']
+
+def generate_rsa_keys(key_size=2048, key_manager=None, backend=None):
+    """Generate RSA public and private keys.
+    With a key_manager, the cached key pair for this size is returned instead.
+    Another backend (e.g. backend='x25519') generates its own kind of key pair."""
+    backend = get_backend(backend)
+    
     # Start key generation time measurement
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    # Generate a private key with the specified key size
-    private_key = rsa.generate_private_key(
-        public_exponent=65537,  # Standard value for e
-        key_size=key_size
-    )
+    if key_manager is not None and isinstance(backend, RSABackend):
+        private_key, public_key = key_manager.get_keys(key_size, backend.public_exponent)
+        retrieval_time = time.perf_counter() - start_time
+        print(f"Key retrieval time: {retrieval_time:.4f} seconds")
+        return private_key, public_key
     
-    # Extract the public key from the private key
-    public_key = private_key.public_key()
+    # Generate a private key (and extract its public key)
+    private_key, public_key = backend.generate_keys(key_size)
     
     # End key generation time measurement
-    generation_time = time.time() - start_time
+    generation_time = time.perf_counter() - start_time
     print(f"Key generation time: {generation_time:.4f} seconds")
     
     return private_key, public_key
 
-def encrypt_message(message, public_key):
-    """Encrypt a message using RSA public key."""
+def encrypt_message(message, public_key, backend=None):
+    """Encrypt a message using RSA public key.
+    backend selects another scheme; by default it follows the key type."""
     # Convert string message to bytes if necessary
     if isinstance(message, str):
         message = message.encode('utf-8')
     
-    # Encrypt the message using OAEP padding
-    ciphertext = public_key.encrypt(
-        message,
-        padding.OAEP(
-            mgf=padding.MGF1(algorithm=hashes.SHA256()),
-            algorithm=hashes.SHA256(),
-            label=None
-        )
-    )
+    # Encrypt the message (with OAEP padding for RSA)
+    ciphertext = get_backend(backend, public_key).encrypt(message, public_key)
     
     return ciphertext
 
-def decrypt_message(ciphertext, private_key):
-    """Decrypt a message using RSA private key."""
-    # Decrypt the ciphertext using OAEP padding
-    plaintext = private_key.decrypt(
-        ciphertext,
-        padding.OAEP(
-            mgf=padding.MGF1(algorithm=hashes.SHA256()),
-            algorithm=hashes.SHA256(),
-            label=None
-        )
-    )
+def decrypt_message(ciphertext, private_key, as_text=True, backend=None):
+    """Decrypt a message using RSA private key.
+    With as_text=False the plaintext bytes are returned without decoding.
+    backend selects another scheme; by default it follows the key type."""
+    # Decrypt the ciphertext (with OAEP padding for RSA)
+    plaintext = get_backend(backend, private_key).decrypt(ciphertext, private_key)
+    
+    if not as_text:
+        return plaintext
     
     # Convert decrypted bytes back to string
     return plaintext.decode('utf-8')
 
-def test_rsa_encryption_decryption():
+# Result of one item of a batch: the output value, or the exception it raised
+BatchItem = namedtuple('BatchItem', ['value', 'error'])
+
+def encrypt_items(messages, public_key):
+    """Encrypt each message, capturing errors (e.g. a message too long) per item."""
+    results = []
+    for message in messages:
+        try:
+            results.append(BatchItem(encrypt_message(message, public_key), None))
+        except Exception as e:
+            results.append(BatchItem(None, e))
+    return results
+
+def decrypt_items(ciphertexts, private_key, as_text=True):
+    """Decrypt each ciphertext, capturing errors (e.g. a corrupted ciphertext) per item."""
+    results = []
+    for ciphertext in ciphertexts:
+        try:
+            results.append(BatchItem(decrypt_message(ciphertext, private_key, as_text), None))
+        except Exception as e:
+            results.append(BatchItem(None, e))
+    return results
+
+@lru_cache(maxsize=8)
+def load_der_key(data, private):
+    """Load a DER key once per worker process."""
+    if private:
+        return serialization.load_der_private_key(data, password=None, unsafe_skip_rsa_key_validation=True)
+    return serialization.load_der_public_key(data)
+
+def encrypt_items_der(messages, public_der):
+    """encrypt_items() for process pools, which receive the key as DER bytes."""
+    return encrypt_items(messages, load_der_key(public_der, False))
+
+def decrypt_items_der(ciphertexts, private_der, as_text=True):
+    """decrypt_items() for process pools, which receive the key as DER bytes."""
+    return decrypt_items(ciphertexts, load_der_key(private_der, True), as_text)
+
+def run_batch(items, task, workers, use_processes, batch_size):
+    """Split items into batches, run task(batch) for each in a pool and return the results in order."""
+    items = list(items)
+    if not items:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if batch_size is None:
+        # A few batches per worker keeps the pool busy without much per-batch overhead
+        batch_size = max(1, min(256, -(-len(items) // (4 * workers))))
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    
+    if workers == 1 or len(batches) == 1:
+        outputs = [task(batch) for batch in batches]
+    else:
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool(max_workers=workers) as executor:
+            outputs = list(executor.map(task, batches))
+    return [result for output in outputs for result in output]
+
+def encrypt_batch(messages, public_key, workers=None, use_processes=False, batch_size=None):
+    """Encrypt many messages in parallel.
+    Returns one BatchItem(value, error) per message, in the input order.
+    Threads are used by default (cryptography releases the GIL during RSA
+    operations); use_processes=True sends the key to worker processes as DER."""
+    if use_processes:
+        public_der = public_key.public_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        return run_batch(messages, partial(encrypt_items_der, public_der=public_der), workers, True, batch_size)
+    return run_batch(messages, partial(encrypt_items, public_key=public_key), workers, False, batch_size)
+
+def decrypt_batch(ciphertexts, private_key, workers=None, use_processes=False, batch_size=None, as_text=True):
+    """Decrypt many ciphertexts in parallel.
+    Returns one BatchItem(value, error) per ciphertext, in the input order.
+    See encrypt_batch for the choice between threads and processes."""
+    if use_processes:
+        private_der = private_key.private_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        task = partial(decrypt_items_der, private_der=private_der, as_text=as_text)
+        return run_batch(ciphertexts, task, workers, True, batch_size)
+    task = partial(decrypt_items, private_key=private_key, as_text=as_text)
+    return run_batch(ciphertexts, task, workers, False, batch_size)
+
+# Hybrid stream format
+#
+# Header: magic, version, wrapped key length, chunk size and a random nonce
+# prefix, followed by the AES-256 key wrapped with encrypt_message (RSA-OAEP).
+# The header and wrapped key are authenticated as associated data of every
+# chunk. Each chunk is AES-GCM encrypted with nonce = prefix + chunk counter +
+# final flag, so chunks cannot be reordered, dropped or truncated unnoticed.
+# The final chunk always holds fewer than chunk_size bytes (possibly none),
+# which is how the reader recognizes it.
+STREAM_MAGIC = b'RSAG'
+STREAM_VERSION = 1
+STREAM_HEADER = struct.Struct('>4sBHI7s')
+STREAM_CHUNK_SIZE = 1 << 20
+# Largest chunk size decrypt_stream accepts by default: the header is read before
+# anything is authenticated, so it must not be able to demand a huge buffer
+MAX_STREAM_CHUNK_SIZE = 16 * STREAM_CHUNK_SIZE
+TAG_SIZE = 16
+
+def stream_nonce(prefix, counter, final):
+    """12-byte AES-GCM nonce for one chunk of a stream."""
+    return prefix + struct.pack('>IB', counter, 1 if final else 0)
+
+def encrypt_stream(source, destination, public_key, chunk_size=STREAM_CHUNK_SIZE):
+    """Encrypt the binary file object source into destination with RSA-OAEP + AES-256-GCM.
+    Memory use is bounded by chunk_size. Returns the number of plaintext bytes."""
+    if not 0 < chunk_size <= MAX_STREAM_CHUNK_SIZE:
+        raise ValueError(f"Invalid chunk size: {chunk_size} (must be 1 to {MAX_STREAM_CHUNK_SIZE})")
+    
+    # Wrap a fresh symmetric key with RSA and write the header
+    key = AESGCM.generate_key(bit_length=256)
+    wrapped_key = encrypt_message(key, public_key)
+    prefix = os.urandom(7)
+    associated_data = STREAM_HEADER.pack(STREAM_MAGIC, STREAM_VERSION, len(wrapped_key), chunk_size, prefix)
+    associated_data += wrapped_key
+    destination.write(associated_data)
+    
+    # Encrypt chunk by chunk; a short read means this is the final chunk
+    aesgcm = AESGCM(key)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    counter = 0
+    total = 0
+    while True:
+        size = read_full(source, view)
+        final = size < chunk_size
+        nonce = stream_nonce(prefix, counter, final)
+        destination.write(aesgcm.encrypt(nonce, bytes(view[:size]), associated_data))
+        total += size
+        if final:
+            return total
+        counter += 1
+        if counter >= 2**32:
+            raise ValueError("Stream too long for this chunk size")
+
+def decrypt_stream(source, destination, private_key, max_chunk_size=MAX_STREAM_CHUNK_SIZE):
+    """Decrypt a stream written by encrypt_stream from source into destination.
+    Raises ValueError for a malformed or truncated stream or a chunk size
+    above max_chunk_size, and cryptography.exceptions.InvalidTag if any
+    chunk was tampered with. Returns the number of plaintext bytes."""
+    header = source.read(STREAM_HEADER.size)
+    if len(header) != STREAM_HEADER.size:
+        raise ValueError("Truncated stream header")
+    magic, version, key_length, chunk_size, prefix = STREAM_HEADER.unpack(header)
+    if magic != STREAM_MAGIC or version != STREAM_VERSION:
+        raise ValueError("Not an encrypted stream or unsupported version")
+    # Checked before the RSA unwrap and before allocating the chunk buffer
+    if not 0 < chunk_size <= max_chunk_size:
+        raise ValueError(f"Stream chunk size {chunk_size} is outside 1..{max_chunk_size}")
+    wrapped_key = source.read(key_length)
+    if len(wrapped_key) != key_length:
+        raise ValueError("Truncated stream header")
+    associated_data = header + wrapped_key
+    aesgcm = AESGCM(decrypt_message(wrapped_key, private_key, as_text=False))
+    
+    # A full-size ciphertext chunk is never the final one
+    buffer = bytearray(chunk_size + TAG_SIZE)
+    view = memoryview(buffer)
+    counter = 0
+    total = 0
+    while True:
+        size = read_full(source, view)
+        final = size < len(buffer)
+        if final and size < TAG_SIZE:
+            raise ValueError("Truncated stream")
+        nonce = stream_nonce(prefix, counter, final)
+        plaintext = aesgcm.decrypt(nonce, bytes(view[:size]), associated_data)
+        destination.write(plaintext)
+        total += len(plaintext)
+        if final:
+            if source.read(1):
+                raise ValueError("Unexpected data after the final chunk")
+            return total
+        counter += 1
+
+def read_full(source, view):
+    """Fill view from source, stopping early only at end of file. Returns the bytes read."""
+    filled = 0
+    while filled < len(view):
+        size = source.readinto(view[filled:])
+        if not size:
+            break
+        filled += size
+    return filled
+
+def test_rsa_encryption_decryption(key_manager=None):
     """Test RSA encryption and decryption with a sample message."""
     # Generate RSA keys
-    private_key, public_key = generate_rsa_keys()
+    private_key, public_key = generate_rsa_keys(key_manager=key_manager)
     
     # Sample message
     original_message = "This is a test message for RSA encryption and decryption."
@@ -78,46 +493,58 @@ def test_rsa_encryption_decryption():
     assert original_message == decrypted_message, "Decryption failed!"
     print("Verification: The decrypted message matches the original message.")
 
-def measure_rsa_performance(max_length=180, step=20):
+def oaep_max_message_length(key_size, hash_algorithm=None):
+    """Exact OAEP plaintext limit in bytes: k - 2*hLen - 2 for a k-byte modulus."""
+    digest_size = (hash_algorithm or hashes.SHA256()).digest_size
+    return (key_size + 7) // 8 - 2 * digest_size - 2
+
+def measure_rsa_performance(max_length=None, step=20, key_manager=None, repeat=5):
     """Measure RSA encryption and decryption performance for different message lengths.
-    Note: Using conservative max_length to avoid encryption errors."""
+    Lengths go up to the exact OAEP limit for the key (or max_length if smaller),
+    and each time is the median of `repeat` runs."""
     # Generate RSA keys
-    private_key, public_key = generate_rsa_keys()
+    private_key, public_key = generate_rsa_keys(key_manager=key_manager)
     
-    # Get approximate maximum message size for this key
-    # For 2048-bit key with OAEP padding using SHA-256, max size is typically around 190 bytes
-    # We'll use a conservative value to be safe
+    # Exact maximum message size for this key with OAEP padding using SHA-256
     key_size = private_key.key_size
-    max_safe_length = (key_size // 8) - 66  # Very conservative estimate for OAEP with SHA-256
+    max_message_length = oaep_max_message_length(key_size)
     
     print(f"Using RSA key size: {key_size} bits")
-    print(f"Maximum safe message length: ~{max_safe_length} bytes (conservative estimate)")
+    print(f"Maximum message length: {max_message_length} bytes (k - 2*hLen - 2 for OAEP with SHA-256)")
     
-    # Limit max_length to be safe
-    if max_length > max_safe_length:
-        max_length = max_safe_length
-        print(f"Limiting maximum test length to {max_length} bytes to prevent encryption errors")
+    if max_length is None or max_length > max_message_length:
+        max_length = max_message_length
     
     # Initialize lists to store results
     message_lengths = []
     encryption_times = []
     decryption_times = []
     
-    for length in range(step, max_length + 1, step):
+    lengths = list(range(step, max_length + 1, step))
+    if not lengths or lengths[-1] != max_length:
+        lengths.append(max_length)
+    
+    for length in lengths:
         # Generate a random message of specified length
         message = ''.join(random.choice('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789') 
                          for _ in range(length))
         
         try:
             # Measure encryption time
-            start_time = time.time()
-            encrypted_message = encrypt_message(message, public_key)
-            encryption_time = time.time() - start_time
+            durations = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                encrypted_message = encrypt_message(message, public_key)
+                durations.append(time.perf_counter() - start_time)
+            encryption_time = statistics.median(durations)
             
             # Measure decryption time
-            start_time = time.time()
-            decrypted_message = decrypt_message(encrypted_message, private_key)
-            decryption_time = time.time() - start_time
+            durations = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                decrypted_message = decrypt_message(encrypted_message, private_key)
+                durations.append(time.perf_counter() - start_time)
+            decryption_time = statistics.median(durations)
             
             # Verify decryption worked
             if message != decrypted_message:
@@ -137,7 +564,7 @@ def measure_rsa_performance(max_length=180, step=20):
     
     # Demonstrate RSA message size limitation
     print("\nDemonstrating RSA message size limitation:")
-    boundary_test(public_key, max_safe_length)
+    boundary_test(public_key, max_message_length)
     
     return message_lengths, encryption_times, decryption_times
 
@@ -147,6 +574,7 @@ def boundary_test(public_key, estimated_max):
         estimated_max - 20,
         estimated_max - 10,
         estimated_max,
+        estimated_max + 1,
         estimated_max + 10,
         estimated_max + 20,
         estimated_max + 50
@@ -155,15 +583,18 @@ def boundary_test(public_key, estimated_max):
     for size in sizes_to_test:
         message = 'A' * size
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
             encrypt_message(message, public_key)
-            encryption_time = time.time() - start_time
+            encryption_time = time.perf_counter() - start_time
             print(f"Size {size} bytes: Successfully encrypted in {encryption_time:.6f}s")
         except Exception as e:
             print(f"Size {size} bytes: Encryption failed - {str(e)}")
 
 def plot_rsa_performance(message_lengths, encryption_times, decryption_times):
     """Plot RSA encryption and decryption performance."""
+    # Imported here so that everything else works without matplotlib installed
+    import matplotlib.pyplot as plt
+    
     plt.figure(figsize=(10, 6))
     
     plt.plot(message_lengths, encryption_times, 'b-o', label='Encryption Time')
@@ -178,77 +609,61 @@ def plot_rsa_performance(message_lengths, encryption_times, decryption_times):
     plt.savefig('rsa_performance.png')
     print("Performance plot saved as 'rsa_performance.png'")
 
-def demonstrate_hybrid_encryption():
-    """Demonstrate a simplified version of hybrid encryption (RSA + simulated symmetric)."""
+def demonstrate_hybrid_encryption(key_manager=None, message_size=8 * 1024 * 1024):
+    """Demonstrate hybrid encryption: RSA-OAEP wraps an AES-256-GCM key that encrypts the data."""
     print("\nDemonstrating Hybrid Encryption Approach:")
     print("-" * 60)
     
     # 1. Generate RSA keys
-    private_key, public_key = generate_rsa_keys()
-    
-    # 2. Generate a random symmetric key (in a real system, this would be an AES key)
-    symmetric_key = ''.join(random.choice('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789') 
-                           for _ in range(32))
-    print(f"Generated symmetric key: {symmetric_key[:10]}... (truncated)")
-    
-    # 3. Encrypt the symmetric key with RSA
-    start_time = time.time()
-    encrypted_sym_key = encrypt_message(symmetric_key, public_key)
-    rsa_time = time.time() - start_time
-    print(f"RSA-encrypted symmetric key (bytes): {encrypted_sym_key[:20]}... (truncated)")
-    print(f"RSA encryption time for key: {rsa_time:.6f}s")
-    
-    # 4. Simulate encrypting a large message with the symmetric key
-    large_message = "This is a very large message that would be too big for RSA encryption. " * 20
-    print(f"Large message length: {len(large_message)} characters")
-    
-    # Simulate symmetric encryption (just XOR with key for demonstration)
-    start_time = time.time()
-    # This is NOT secure encryption - just a simulation!
-    simulated_encrypted = ''.join(chr(ord(m) ^ ord(symmetric_key[i % len(symmetric_key)])) 
-                                 for i, m in enumerate(large_message))
-    sym_encryption_time = time.time() - start_time
-    print(f"Simulated symmetric encryption time: {sym_encryption_time:.6f}s")
-    print(f"Total encryption time: {rsa_time + sym_encryption_time:.6f}s")
-    
-    # 5. Decryption process
-    # First decrypt the symmetric key using RSA
-    start_time = time.time()
-    decrypted_sym_key = decrypt_message(encrypted_sym_key, private_key)
-    rsa_decryption_time = time.time() - start_time
-    
-    # Then simulate decrypting the message using the symmetric key
-    start_time = time.time()
-    simulated_decrypted = ''.join(chr(ord(c) ^ ord(decrypted_sym_key[i % len(decrypted_sym_key)])) 
-                                 for i, c in enumerate(simulated_encrypted))
-    sym_decryption_time = time.time() - start_time
-    
-    print(f"RSA decryption time for key: {rsa_decryption_time:.6f}s")
-    print(f"Simulated symmetric decryption time: {sym_decryption_time:.6f}s")
-    print(f"Total decryption time: {rsa_decryption_time + sym_decryption_time:.6f}s")
+    private_key, public_key = generate_rsa_keys(key_manager=key_manager)
+    
+    # 2. A message far too large for RSA alone
+    large_message = b"This is a very large message that would be too big for RSA encryption. "
+    large_message = (large_message * (message_size // len(large_message) + 1))[:message_size]
+    print(f"Large message length: {len(large_message)} bytes")
+    
+    # 3. Encrypt: a fresh AES key is wrapped with RSA, the data is encrypted in chunks with AES-GCM
+    encrypted = io.BytesIO()
+    start_time = time.perf_counter()
+    encrypt_stream(io.BytesIO(large_message), encrypted, public_key)
+    encryption_time = time.perf_counter() - start_time
+    print(f"Encrypted size: {len(encrypted.getvalue())} bytes "
+          f"({len(encrypted.getvalue()) - len(large_message)} bytes of header, wrapped key and tags)")
+    print(f"Hybrid encryption time: {encryption_time:.6f}s "
+          f"({len(large_message) / encryption_time / 1e6:.1f} MB/s)")
+    
+    # 4. Decrypt: RSA unwraps the AES key, then every chunk is authenticated and decrypted
+    decrypted = io.BytesIO()
+    encrypted.seek(0)
+    start_time = time.perf_counter()
+    decrypt_stream(encrypted, decrypted, private_key)
+    decryption_time = time.perf_counter() - start_time
+    print(f"Hybrid decryption time: {decryption_time:.6f}s "
+          f"({len(large_message) / decryption_time / 1e6:.1f} MB/s)")
     
     # Verify
-    assert symmetric_key == decrypted_sym_key
-    assert large_message == simulated_decrypted
+    assert large_message == decrypted.getvalue()
     print("Verification: Hybrid encryption/decryption successful")
 
 def main():
-    # Test RSA encryption and decryption
-    print("\nTesting RSA Encryption and Decryption:")
-    print("-" * 60)
-    test_rsa_encryption_decryption()
-    
-    # Measure and plot performance
-    print("\nMeasuring RSA Performance:")
-    print("-" * 60)
-    message_lengths, encryption_times, decryption_times = measure_rsa_performance()
-    
-    # Only plot if we have data
-    if message_lengths:
-        plot_rsa_performance(message_lengths, encryption_times, decryption_times)
-    
-    # Demonstrate hybrid approach
-    demonstrate_hybrid_encryption()
+    # One key manager for the whole run, so the key pair is generated (or loaded) only once
+    with KeyManager(pool_size=0) as key_manager:
+        # Test RSA encryption and decryption
+        print("\nTesting RSA Encryption and Decryption:")
+        print("-" * 60)
+        test_rsa_encryption_decryption(key_manager)
+        
+        # Measure and plot performance
+        print("\nMeasuring RSA Performance:")
+        print("-" * 60)
+        message_lengths, encryption_times, decryption_times = measure_rsa_performance(key_manager=key_manager)
+        
+        # Only plot if we have data
+        if message_lengths:
+            plot_rsa_performance(message_lengths, encryption_times, decryption_times)
+        
+        # Demonstrate hybrid approach
+        demonstrate_hybrid_encryption(key_manager)
     
     # Discuss limitations and recommendations
     print("\nLimitations of RSA Cryptosystem:")